@@ -2,15 +2,12 @@ from sqladmin import Admin, ModelView
 from sqladmin.authentication import AuthenticationBackend
 from starlette.requests import Request
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 import os
 
 from app import models
+from app.auth import authenticate_user
 from app.database import SessionLocal
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 # ---------- Authentication Backend ----------
 class AdminAuth(AuthenticationBackend):
@@ -20,8 +17,8 @@ class AdminAuth(AuthenticationBackend):
 
         db: Session = SessionLocal()
         try:
-            user = db.query(models.User).filter(models.User.username == username).first()
-            if user and pwd_context.verify(password, user.hashed_password):
+            user = await authenticate_user(db, username, password)
+            if user:
                 request.session.update({"user": user.username})
                 return True
             return False
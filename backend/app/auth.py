@@ -1,24 +1,51 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+import anyio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app import models, schemas
-from app.database import get_db
+from app import changes, metrics, models, schemas
+from app.database import get_db, run_in_db_thread
+from app.reference_cache import get_by
 
 # --- Configuration ---
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# bcrypt cost factor for new hashes; stored hashes with another cost are
+# rehashed the next time their user signs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Password hashes computed at once per worker; 0 runs them on the event loop.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", 1024))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", 60))
 
 # --- Hashing ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+_hash_limiter = None
+
+
+async def run_in_hash_thread(func, *args):
+    """
+    Runs a bcrypt call in a worker thread, at most PASSWORD_HASH_WORKERS at a
+    time. bcrypt releases the GIL, so this keeps the event loop free, and the
+    separate limit stops a burst of logins from taking every DB thread.
+    """
+    global _hash_limiter
+    if PASSWORD_HASH_WORKERS <= 0:
+        return func(*args)
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(PASSWORD_HASH_WORKERS)
+    return await anyio.to_thread.run_sync(func, *args, limiter=_hash_limiter)
 
 # --- OAuth2 Scheme ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -43,6 +70,27 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def _save_password_hash(db: Session, user, new_hash: str):
+    user.hashed_password = new_hash
+    db.commit()
+
+
+async def authenticate_user(db: Session, login: str, password: str):
+    """
+    Returns the user for `login` (email or username) if `password` matches,
+    otherwise None. Hashes made with outdated settings are upgraded in place.
+    """
+    user = await run_in_db_thread(get_user_for_login, db, login)
+    if user is None:
+        return None
+    valid, new_hash = await run_in_hash_thread(pwd_context.verify_and_update, password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        await run_in_db_thread(_save_password_hash, db, user, new_hash)
+    return user
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -54,9 +102,83 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+# --- User Cache ---
+class UserCache:
+    """
+    Per-worker LRU + TTL cache of authenticated users, keyed by the token
+    subject (the user's email). Any committed change to `users` clears it.
+    """
+
+    def __init__(self, max_size=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # subject -> (expires_at, schemas.UserOut)
+        self._generation = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, subject: str) -> schemas.UserOut | None:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return entry[1]
+
+    def put(self, subject: str, user: schemas.UserOut, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return  # the users table changed while this user was loaded
+            self._entries[subject] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+@changes.subscribe
+def _invalidate_user_cache(committed):
+    if any(change.table == "users" for change in committed):
+        user_cache.invalidate()
+
+
 # --- Dependencies ---
 def get_user(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
+    return get_by(db, models.User, username=username)
+
+
+def get_user_by_email(db: Session, email: str):
+    return get_by(db, models.User, email=email)
+
+
+def get_user_for_login(db: Session, login: str):
+    """
+    Finds the user signing in by email or username. An email match wins, so
+    a username that looks like someone else's email can't shadow them.
+    """
+    return get_user_by_email(db, login) or get_user(db, login)
+
+
+def _load_user(db: Session, subject: str) -> schemas.UserOut | None:
+    generation = user_cache.generation()
+    user = get_user_by_email(db, subject)
+    if user is None:
+        return None
+    user = schemas.UserOut.model_validate(user)
+    user_cache.put(subject, user, generation)
+    return user
 
 
 async def get_current_user(
@@ -75,7 +197,11 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = get_user(db, username=token_data.username)
+    # The token subject is the user's email (see /auth/login)
+    user = user_cache.get(token_data.username)
+    metrics.count_cache("user", user is not None)
+    if user is None:
+        user = await run_in_db_thread(_load_user, db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import re
+import select
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, func, insert, or_, select as sql_select, text
+from sqlalchemy.orm import Session
+
+from app import changes, models
+from app.changes import LOCAL_TABLES, Change
+from app.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# 'notify' uses Postgres LISTEN/NOTIFY, 'poll' a change_events table every
+# worker polls, 'auto' picks notify on Postgres (psycopg2) and poll otherwise,
+# 'off' keeps changes inside the worker that made them.
+CHANGE_BUS = os.getenv("CHANGE_BUS", "auto")
+CHANGE_BUS_CHANNEL = os.getenv("CHANGE_BUS_CHANNEL", "polyglot_changes")
+CHANGE_POLL_INTERVAL = float(os.getenv("CHANGE_POLL_INTERVAL", 1.0))
+CHANGE_EVENT_RETENTION = int(os.getenv("CHANGE_EVENT_RETENTION", 3600))  # seconds
+
+CHANGE_BUS_MODES = ("auto", "notify", "poll", "off")
+if CHANGE_BUS not in CHANGE_BUS_MODES:
+    raise ValueError(f"Unknown CHANGE_BUS '{CHANGE_BUS}'. Expected one of {CHANGE_BUS_MODES}")
+if not re.fullmatch(r"[a-z_][a-z0-9_]*", CHANGE_BUS_CHANNEL):
+    raise ValueError(f"CHANGE_BUS_CHANNEL must be a plain lowercase identifier, got '{CHANGE_BUS_CHANNEL}'")
+
+# NOTIFY payloads must stay under 8000 bytes; bigger batches are coarsened.
+PAYLOAD_LIMIT = 7500
+PRUNE_EVERY = 60  # seconds
+# How long a skipped change_events id is re-read before we assume its
+# transaction rolled back, and how many skipped ids one read may leave.
+GAP_TIMEOUT = 60  # seconds
+MAX_GAPS = 1000
+
+
+def origin() -> str:
+    """
+    Identifies this worker process, so it can skip its own events (it has
+    already published them locally on commit).
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encode(committed) -> str | None:
+    """
+    JSON list of [table, college_id, row_id, op] for the changes other
+    workers need to hear about. When the batch is too large for one NOTIFY,
+    row ids and then college ids are dropped; subscribers treat a missing id
+    as "anything in that table (or college) may have changed".
+    """
+    rows = list(dict.fromkeys(tuple(c) for c in committed if c.table not in LOCAL_TABLES))
+    if not rows:
+        return None
+    payload = json.dumps(rows, separators=(",", ":"))
+    if len(payload) > PAYLOAD_LIMIT:
+        rows = list(dict.fromkeys((table, college_id, None, "update") for table, college_id, _, _ in rows))
+        payload = json.dumps(rows, separators=(",", ":"))
+    if len(payload) > PAYLOAD_LIMIT:
+        rows = list(dict.fromkeys((table, None, None, "update") for table, _, _, _ in rows))
+        payload = json.dumps(rows, separators=(",", ":"))
+    return payload
+
+
+def decode(payload: str) -> list[Change]:
+    return [Change(*row) for row in json.loads(payload)]
+
+
+def _everything_changed() -> list[Change]:
+    return [Change(table, None, None, "update") for table in Base.metadata.tables if table not in LOCAL_TABLES]
+
+
+def _resolve_mode(mode: str, bind) -> str:
+    url = bind.url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return "off"  # an in-memory database can't be shared between processes anyway
+    if mode == "auto":
+        return "notify" if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2" else "poll"
+    if mode == "notify" and bind.dialect.driver != "psycopg2":
+        raise ValueError(f"CHANGE_BUS=notify needs Postgres with psycopg2, not {bind.dialect.name}+{bind.dialect.driver}")
+    return mode
+
+
+class ChangeBus:
+    """
+    Carries committed changes between worker processes (and hosts). Commits
+    write their changes into the database in the same transaction, so
+    nothing is broadcast for a rollback; a background thread in each worker
+    receives the other workers' changes and hands them to the local
+    `changes` subscribers, exactly as if they had been committed here.
+    """
+
+    def __init__(self, bind, mode=CHANGE_BUS):
+        self.engine = bind
+        self.mode = _resolve_mode(mode, bind)
+        self.received = 0
+        self.last_received_at = None
+        self.last_error = None
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Sending ---
+    def emit(self, session: Session, committed):
+        payload = encode(committed)
+        if payload is None or self.mode == "off":
+            return
+        if self.mode == "notify":
+            session.execute(text("SELECT pg_notify(:channel, :message)"),
+                            {"channel": CHANGE_BUS_CHANNEL, "message": f"{origin()} {payload}"})
+        else:
+            session.execute(insert(models.ChangeEvent).values(origin=origin(), payload=payload))
+
+    # --- Receiving ---
+    def _deliver(self, source: str, payload: str):
+        if source == origin():
+            return
+        self.received += 1
+        self.last_received_at = time.time()
+        changes.publish(decode(payload))
+
+    def _listen(self):
+        backoff = 1
+        connected_before = False
+        while not self._stop.is_set():
+            raw = None
+            try:
+                # A dedicated connection outside the pool, held for as long as the worker runs.
+                raw = self.engine.raw_connection()
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANGE_BUS_CHANNEL}")
+                if connected_before:
+                    # Notifications sent while we were disconnected are lost.
+                    self.reconnects += 1
+                    changes.publish(_everything_changed())
+                connected_before = True
+                self.last_error = None
+                backoff = 1
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            source, payload = conn.notifies.pop(0).payload.split(" ", 1)
+                            self._deliver(source, payload)
+            except Exception as e:
+                self.last_error = type(e).__name__  # the message is logged, not served
+                logger.warning(f"Change bus listener failed, retrying in {backoff}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if raw is not None:
+                    raw.close()
+
+    def _poll(self):
+        last_id = None
+        # Ids below last_id we haven't seen yet -> when we noticed the gap.
+        # With concurrent writers (Postgres) a lower id can commit after a
+        # higher one has been read, so gaps are re-read until they show up
+        # or GAP_TIMEOUT says the transaction rolled back.
+        gaps = {}
+        last_prune = 0.0
+        while not self._stop.wait(CHANGE_POLL_INTERVAL if last_id is not None else 0):
+            try:
+                with self.engine.connect() as conn:
+                    if last_id is None:
+                        # Start from now; older events were for caches this worker never had.
+                        last_id = conn.scalar(sql_select(func.max(models.ChangeEvent.id))) or 0
+                        continue
+                    new = models.ChangeEvent.id > last_id
+                    rows = conn.execute(
+                        sql_select(models.ChangeEvent.id, models.ChangeEvent.origin, models.ChangeEvent.payload)
+                        .where(or_(new, models.ChangeEvent.id.in_(list(gaps))) if gaps else new)
+                        .order_by(models.ChangeEvent.id)
+                    ).all()
+                now = time.monotonic()
+                for event_id, source, payload in rows:
+                    if gaps.pop(event_id, None) is None:
+                        for missing in range(max(last_id + 1, event_id - MAX_GAPS), event_id):
+                            gaps[missing] = now
+                        last_id = max(last_id, event_id)
+                    self._deliver(source, payload)
+                for missing in [i for i, noticed in gaps.items() if now - noticed > GAP_TIMEOUT]:
+                    del gaps[missing]
+                if now - last_prune > PRUNE_EVERY:
+                    last_prune = now
+                    cutoff = datetime.now(timezone.utc) - timedelta(seconds=CHANGE_EVENT_RETENTION)
+                    with self.engine.begin() as conn:
+                        conn.execute(delete(models.ChangeEvent).where(models.ChangeEvent.created_at < cutoff))
+                self.last_error = None
+            except Exception as e:
+                self.last_error = type(e).__name__  # the message is logged, not served
+                logger.warning(f"Change bus poll failed: {e}")
+
+    def start(self):
+        if self._thread is not None or self.mode == "off":
+            return
+        self._stop.clear()
+        target = self._listen if self.mode == "notify" else self._poll
+        self._thread = threading.Thread(target=target, name="change-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5)
+        self._thread = None
+
+    def status(self) -> dict:
+        return {
+            "mode": self.mode,
+            "running": self._thread is not None,
+            "origin": origin(),
+            "received": self.received,
+            "last_received_at": self.last_received_at,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+change_bus = ChangeBus(engine)
+
+
+# ---------- Session Hooks ----------
+# Any process that imports this module broadcasts its commits, including
+# scripts that write through SessionLocal.
+@event.listens_for(Session, "before_commit")
+def _broadcast_changes(session):
+    session.flush()  # collect the ORM changes this commit is about to write
+    pending = session.info.get("pending_changes")
+    if pending:
+        change_bus.emit(session, pending)
@@ -0,0 +1,79 @@
+import logging
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# A single committed row change. `college_id` is the college the row belongs
+# to (the row's own id for `colleges`), or None for global tables.
+Change = namedtuple("Change", ["table", "college_id", "row_id", "op"])
+
+# Tables no cache reads from. Their writes are not broadcast to other
+# workers and don't count as data changes.
+LOCAL_TABLES = {"logs", "log_rollups", "import_jobs", "change_events", "data_version"}
+
+_subscribers = []
+
+
+def subscribe(callback):
+    """
+    Registers `callback(changes)` to be called with the list of changes
+    made by every committed transaction in this worker.
+    """
+    _subscribers.append(callback)
+    return callback
+
+
+def record_change(session: Session, table: str, college_id=None, row_id=None, op="update"):
+    """
+    Records a change the ORM can't see (e.g. a Core bulk insert) so it is
+    published together with the session's next commit.
+    """
+    session.info.setdefault("pending_changes", []).append(Change(table, college_id, row_id, op))
+
+
+def publish(changes):
+    for callback in list(_subscribers):
+        try:
+            callback(changes)
+        except Exception as e:
+            logger.error(f"Change subscriber {callback.__name__} failed: {e}")
+
+
+def _college_id_of(obj):
+    if obj.__tablename__ == "colleges":
+        return obj.id
+    return getattr(obj, "college_id", None)
+
+
+# ---------- Session Hooks ----------
+# These listen on the base Session class, so they cover the API's sessions
+# as well as the ones SQLAdmin creates for its views.
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault("pending_changes", [])
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if not hasattr(obj, "__tablename__"):
+                continue
+            if op == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            pending.append(Change(obj.__tablename__, _college_id_of(obj), getattr(obj, "id", None), op))
+            # A row moved to another college changes the old college too.
+            if op == "update" and "college_id" in inspect(obj).attrs.keys():
+                for old_college_id in inspect(obj).attrs.college_id.history.deleted:
+                    pending.append(Change(obj.__tablename__, old_college_id, obj.id, op))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    changes = session.info.pop("pending_changes", None)
+    if changes:
+        publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("pending_changes", None)
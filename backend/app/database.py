@@ -1,21 +1,67 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+import anyio
 import os
 from dotenv import load_dotenv
 
+from app.pool import InstrumentedQueuePool, PoolHealthCheck
+from app.replicas import ReplicaSet, RoutingSession
+
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+# Comma-separated read replica URLs. Sessions opened with read_only=True
+# (see get_read_db) send their SELECTs to one of them.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# --- Connection Pool ---
+# Sizes are per gunicorn worker, so the server sees up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds; -1 disables
+# How stale connections are found: 'always' pings on every checkout,
+# 'background' pings from a health-check thread every
+# DB_HEALTH_CHECK_INTERVAL seconds, 'off' relies on DB_POOL_RECYCLE alone.
+DB_PRE_PING = os.getenv("DB_PRE_PING", "background")
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", 30))
+
+PRE_PING_STRATEGIES = ("always", "background", "off")
+if DB_PRE_PING not in PRE_PING_STRATEGIES:
+    raise ValueError(f"Unknown DB_PRE_PING '{DB_PRE_PING}'. Expected one of {PRE_PING_STRATEGIES}")
+
+
+def _engine_options(url) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite keeps its single-connection pool
+    return dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_PRE_PING == "always",
+    )
+
 
 # Create the SQLAlchemy engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    # This setting helps manage stale connections by testing them before use.
-    # It will make the app more resilient to temporary network issues.
-    pool_pre_ping=True
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
+pool_health = PoolHealthCheck(engine, DB_HEALTH_CHECK_INTERVAL if DB_PRE_PING == "background" else 0)
+replicas = ReplicaSet(create_engine(url, **_engine_options(url)) for url in DATABASE_REPLICA_URLS)
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    stats = pool.stats() if isinstance(pool, InstrumentedQueuePool) else {"status": pool.status()}
+    stats["pre_ping"] = DB_PRE_PING
+    stats["recycle_seconds"] = DB_POOL_RECYCLE
+    stats["health_check"] = pool_health.status()
+    stats["replicas"] = replicas.stats()
+    return stats
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas)
 Base = declarative_base()
 
 def get_db():
@@ -24,3 +70,37 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """
+    Like get_db, for endpoints that only read: queries go to a healthy read
+    replica when DATABASE_REPLICA_URLS is set, and to the primary otherwise.
+    """
+    db = SessionLocal(read_only=True)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# ---------- Thread Offloading ----------
+# `async def` endpoints hand their synchronous SQLAlchemy work to a bounded
+# thread pool so a slow query doesn't block the worker's event loop.
+# Setting DB_THREADPOOL_SIZE=0 runs the work inline on the loop instead.
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", 16))
+_db_limiter = None
+
+async def run_in_db_thread(func, *args, abandon_on_cancel=False):
+    """
+    With abandon_on_cancel=True a cancelled caller (e.g. a timeout) stops
+    waiting right away and `func` finishes on its own in the background, so
+    it must not use anything the caller cleans up, such as its db session.
+    anyio frees the limiter slot as soon as the caller is cancelled, so
+    abandoned work isn't bounded by DB_THREADPOOL_SIZE; callers must bound
+    it themselves (see intent_slots).
+    """
+    global _db_limiter
+    if DB_THREADPOOL_SIZE <= 0:
+        return func(*args)
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(DB_THREADPOOL_SIZE)
+    return await anyio.to_thread.run_sync(func, *args, limiter=_db_limiter, abandon_on_cancel=abandon_on_cancel)
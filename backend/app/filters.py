@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from app import models
+
+
+def to_utc(value: datetime) -> datetime:
+    # Naive datetimes from query strings are taken to be UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def filter_logs(query, college_id: int | None = None, since: datetime | None = None, until: datetime | None = None):
+    """
+    Applies the common log filters to a Query or a select(): one college and
+    a [since, until) time range.
+    """
+    if college_id is not None:
+        query = query.filter(models.Log.college_id == college_id)
+    if since is not None:
+        query = query.filter(models.Log.timestamp >= to_utc(since))
+    if until is not None:
+        query = query.filter(models.Log.timestamp < to_utc(until))
+    return query
@@ -0,0 +1,170 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.importers import import_csv
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 2))
+IMPORT_MAX_QUEUED = int(os.getenv("IMPORT_MAX_QUEUED", 20))
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "polyglot-imports"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_active_jobs = set()  # ids of jobs queued or running in this worker
+_active_jobs_lock = threading.Lock()
+_stopping = threading.Event()
+
+
+class ImportQueueFull(Exception):
+    pass
+
+
+class ImportInterrupted(Exception):
+    """
+    Raised inside a running job, between batches, when the server shuts down.
+    """
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Created on first use, so it never exists in a process that later forks.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import")
+        return _executor
+
+
+def submit_import(db: Session, entity: str, college_id: int, binary_file, user_id: int | None,
+                  mode: str = "insert") -> models.ImportJob:
+    """
+    Spools the upload to local disk, records a queued job and hands it to
+    the import worker pool. Returns immediately with the job row.
+    """
+    job_id = uuid.uuid4().hex
+    # Reserve the slot before spooling; uploads run on several threads.
+    with _active_jobs_lock:
+        if len(_active_jobs) >= IMPORT_MAX_QUEUED:
+            raise ImportQueueFull(f"Too many imports in progress on this worker (limit {IMPORT_MAX_QUEUED}).")
+        _active_jobs.add(job_id)
+
+    path = os.path.join(IMPORT_SPOOL_DIR, f"{job_id}.csv")
+    queued = False
+    try:
+        os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+        with open(path, "wb") as spool:
+            shutil.copyfileobj(binary_file, spool, length=1024 * 1024)
+
+        job = models.ImportJob(id=job_id, entity=entity, college_id=college_id, created_by=user_id,
+                                mode=mode, status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        queued = True
+
+        _get_executor().submit(_run_import, job_id, path)
+    except BaseException:
+        _active_jobs.discard(job_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if queued:
+            # The job row exists but will never run.
+            job.status = "failed"
+            job.message = "Could not start the import"
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        raise
+    return job
+
+
+def _run_import(job_id: str, path: str):
+    db = SessionLocal()
+    job = None
+    try:
+        # Only a queued job is started; shutdown() may already have failed it.
+        claimed = db.execute(
+            update(models.ImportJob)
+            .where(models.ImportJob.id == job_id, models.ImportJob.status == "queued")
+            .values(status="running", started_at=datetime.now(timezone.utc))
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return
+        job = db.get(models.ImportJob, job_id)
+        if _stopping.is_set():
+            raise ImportInterrupted("Interrupted by server shutdown")
+
+        def save_progress(result):
+            job.rows_processed = result.rows_processed
+            job.inserted = result.inserted
+            job.updated = result.updated
+            job.unchanged = result.unchanged
+            job.deleted = result.deleted
+            job.error_count = result.error_count
+            job.errors = list(result.errors)
+            db.commit()
+            if _stopping.is_set():
+                raise ImportInterrupted("Interrupted by server shutdown")
+
+        with open(path, "rb") as f:
+            result = import_csv(db, job.entity, job.college_id, f, on_progress=save_progress, mode=job.mode)
+        save_progress(result)
+        job.status = "succeeded"
+        job.message = result.summary()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Import job {job_id} failed: {e}")
+        job = db.get(models.ImportJob, job_id)
+        if job is not None:
+            job.status = "failed"
+            job.message = str(e)
+    finally:
+        if job is not None:
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        db.close()
+        _active_jobs.discard(job_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def shutdown():
+    """
+    Stops taking jobs and marks the ones this worker won't finish as failed,
+    so they don't look queued or running forever. Running jobs stop after
+    their current batch and mark themselves failed; queued ones are
+    cancelled and marked here.
+    """
+    global _executor
+    _stopping.set()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if not _active_jobs:
+        return
+    db = SessionLocal()
+    try:
+        db.query(models.ImportJob).filter(
+            models.ImportJob.id.in_(list(_active_jobs)),
+            models.ImportJob.status == "queued",
+        ).update({"status": "failed", "message": "Interrupted by server shutdown",
+                  "finished_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
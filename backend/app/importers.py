@@ -0,0 +1,417 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from datetime import date
+from itertools import islice
+
+from sqlalchemy import insert, update, delete, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.changes import record_change
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+MAX_REPORTED_ERRORS = 100
+DELETE_CHUNK_SIZE = 1000
+
+# 'insert' adds every row; 'upsert' matches rows on the spec's natural key and
+# only writes new or changed ones; 'sync' also deletes rows missing from the file.
+IMPORT_MODES = ("insert", "upsert", "sync")
+
+
+# ---------- Column Parsers ----------
+def _text(value):
+    value = value.strip()
+    if not value:
+        raise ValueError("must not be empty")
+    return value
+
+
+def _parse_date(value):
+    return date.fromisoformat(value.strip())
+
+
+def _parse_int(value):
+    return int(value.strip())
+
+
+def _parse_float(value):
+    return float(value.strip().replace(",", ""))
+
+
+class InvalidImportFile(Exception):
+    """
+    Raised for problems with the file as a whole (e.g. missing headers).
+    """
+
+
+def row_hash(values: dict, fields) -> str:
+    """
+    Stable hash of a row's imported fields, used to skip unchanged rows.
+    """
+    payload = json.dumps([values.get(name) for name in fields], default=str, separators=(",", ":"))
+    return hashlib.md5(payload.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class ImportSpec:
+    """
+    Describes how CSV rows map onto one model: `fields` maps column name to
+    (parser, required), `aliases` maps alternative header names onto them, and
+    `key` names the fields that identify a row within a college.
+    """
+
+    def __init__(self, model, fields: dict, key: tuple, aliases: dict | None = None):
+        self.model = model
+        self.fields = fields
+        self.key = key
+        self.aliases = aliases or {}
+        self.search_columns = [(source, search) for m, source, search in models.SEARCH_COLUMNS if m is model]
+        # Optional fields left blank get the column's Python-side default
+        # (e.g. FAQ language "en") rather than NULL.
+        self.defaults = {}
+        for name in fields:
+            default = model.__table__.c[name].default
+            self.defaults[name] = default.arg if default is not None and default.is_scalar else None
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def required(self) -> list[str]:
+        return [name for name, (_, required) in self.fields.items() if required]
+
+    def header_map(self, fieldnames) -> dict:
+        """
+        Maps each field to the CSV header that supplies it, or raises if a
+        required field has no column.
+        """
+        mapping = {}
+        for header in fieldnames or []:
+            name = header.strip()
+            name = self.aliases.get(name, name)
+            if name in self.fields and name not in mapping:
+                mapping[name] = header
+        missing = [name for name in self.required if name not in mapping]
+        if missing:
+            raise InvalidImportFile(f"CSV headers are incorrect. Missing: {missing}. Expected at least: {self.required}")
+        return mapping
+
+    def validate(self, rows: list[dict], header_map: dict, college_id: int, first_line: int):
+        """
+        Parses a batch column by column. Returns (line, values) for the valid
+        rows, with values ready for INSERT, and (line, message) pairs for the
+        invalid ones.
+        """
+        parsed = [{"college_id": college_id} for _ in rows]
+        bad = {}
+        for name, (parser, required) in self.fields.items():
+            header = header_map.get(name)
+            values = [row.get(header) for row in rows] if header else [None] * len(rows)
+            for i, raw in enumerate(values):
+                if raw is None or not raw.strip():
+                    if required:
+                        bad.setdefault(i, f"'{name}' is required")
+                    else:
+                        parsed[i][name] = self.defaults[name]
+                    continue
+                try:
+                    parsed[i][name] = parser(raw)
+                except (ValueError, TypeError) as e:
+                    bad.setdefault(i, f"'{name}': {e}")
+
+        valid = []
+        for i, values in enumerate(parsed):
+            if i in bad:
+                continue
+            for source, search in self.search_columns:
+                values[search] = models.normalize_name(values.get(source))
+            values["row_hash"] = row_hash(values, self.fields)
+            valid.append((first_line + i, values))
+        errors = [(first_line + i, message) for i, message in sorted(bad.items())]
+        return valid, errors
+
+    def key_of(self, values) -> tuple:
+        return tuple(values.get(name) for name in self.key)
+
+    def existing_rows(self, db: Session, college_id: int):
+        """
+        Loads the college's current rows as {key: (id, row_hash)}, plus the
+        ids of any extra rows that share a key with an earlier one.
+        """
+        table = self.model.__table__
+        statement = select(table.c.id, table.c.row_hash, *(table.c[name] for name in self.key)).where(
+            table.c.college_id == college_id
+        ).order_by(table.c.id)
+        existing, duplicates = {}, []
+        for row in db.execute(statement):
+            key = tuple(row[2:])
+            if key in existing:
+                duplicates.append(row.id)
+            else:
+                existing[key] = (row.id, row.row_hash)
+        return existing, duplicates
+
+
+IMPORT_SPECS = {
+    "fees": ImportSpec(models.Fee, {
+        "program": (_text, True),
+        "year": (_parse_int, False),
+        "amount": (_parse_float, True),
+        "deadline": (_parse_date, True),
+        "dept_id": (_parse_int, False),
+    }, key=("program", "year"), aliases={"course_name": "program", "course": "program"}),
+    "faqs": ImportSpec(models.FAQ, {
+        "category": (_text, True),
+        "question": (_text, True),
+        "answer": (_text, True),
+        "language": (_text, False),
+        "dept_id": (_parse_int, False),
+    }, key=("question",)),
+    "holidays": ImportSpec(models.Holiday, {
+        "holiday_name": (_text, True),
+        "start_date": (_parse_date, True),
+        "end_date": (_parse_date, True),
+        "dept_id": (_parse_int, False),
+    }, key=("holiday_name", "start_date"), aliases={"name": "holiday_name"}),
+    "admissions": ImportSpec(models.Admission, {
+        "course": (_text, True),
+        "eligibility": (_text, True),
+        "process": (_text, True),
+        "last_date": (_parse_date, True),
+        "dept_id": (_parse_int, False),
+    }, key=("course",)),
+    "scholarships": ImportSpec(models.Scholarship, {
+        "name": (_text, True),
+        "eligibility": (_text, True),
+        "amount": (_parse_float, True),
+        "deadline": (_parse_date, True),
+    }, key=("name",)),
+    "timetables": ImportSpec(models.Timetable, {
+        "course": (_text, True),
+        "year": (_parse_int, True),
+        "semester": (_parse_int, True),
+        "timetable_url": (_text, True),
+        "dept_id": (_parse_int, False),
+    }, key=("course", "year", "semester")),
+}
+
+
+# ---------- Bulk Writes ----------
+def _copy_rows(db: Session, model, rows: list[dict]):
+    """
+    Postgres COPY of a batch through the session's own connection, so it is
+    part of the batch's transaction.
+    """
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(db: Session, model, rows: list[dict]):
+    """
+    Inserts rows with COPY on Postgres, otherwise as a multi-row INSERT.
+    Rows must all have the same keys.
+    """
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, model, rows)
+    else:
+        # Core insert on the table skips the ORM's per-row bulk bookkeeping
+        db.execute(insert(model.__table__), rows)
+
+
+def bulk_update(db: Session, model, rows: list[dict]):
+    """
+    Updates rows by primary key; each dict carries its row's `id`.
+    """
+    if rows:
+        db.execute(update(model), rows)
+
+
+def bulk_delete(db: Session, model, ids: list[int]):
+    for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+        db.execute(delete(model.__table__).where(model.__table__.c.id.in_(ids[start:start + DELETE_CHUNK_SIZE])))
+
+
+# ---------- Import Pipeline ----------
+class ImportResult:
+    def __init__(self, entity: str, mode: str = "insert"):
+        self.entity = entity
+        self.mode = mode
+        self.rows_processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    def add_errors(self, errors):
+        self.error_count += len(errors)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend(f"Row {line}: {message}" for line, message in errors[:max(room, 0)])
+
+    @property
+    def seconds(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> str:
+        if self.mode == "insert":
+            return f"Successfully uploaded and created {self.inserted} {self.entity} records."
+        message = (
+            f"Successfully uploaded {self.entity}: {self.inserted} created, "
+            f"{self.updated} updated, {self.unchanged} unchanged"
+        )
+        if self.mode == "sync":
+            if self.error_count:
+                return message + ". Missing rows were not deleted because the file had invalid rows."
+            message += f", {self.deleted} deleted"
+        return message + "."
+
+    def as_dict(self) -> dict:
+        return {
+            "entity": self.entity,
+            "mode": self.mode,
+            "rows_processed": self.rows_processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "deleted": self.deleted,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def read_batches(binary_file, batch_size: int):
+    """
+    Streams a CSV upload as (fieldnames, first line number, rows) batches
+    without reading the whole file into memory.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline=""))
+    line = 2  # line 1 is the header
+    while True:
+        rows = list(islice(reader, batch_size))
+        if not rows:
+            if line == 2:
+                yield reader.fieldnames, line, []
+            return
+        yield reader.fieldnames, line, rows
+        line += len(rows)
+
+
+def _plan_upsert(spec: ImportSpec, valid, existing: dict, seen: dict, result: ImportResult):
+    """
+    Splits a validated batch into rows to insert and rows to update, counting
+    unchanged ones. A key repeated within the file is reported as an error.
+    """
+    inserts, updates, errors = [], [], []
+    for line, values in valid:
+        key = spec.key_of(values)
+        if key in seen:
+            errors.append((line, f"duplicate of row {seen[key]} for {spec.key}"))
+            continue
+        seen[key] = line
+        match = existing.get(key)
+        if match is None:
+            inserts.append(values)
+        elif match[1] == values["row_hash"]:
+            result.unchanged += 1
+        else:
+            updates.append({"id": match[0], **values})
+    return inserts, updates, errors
+
+
+def import_csv(db: Session, entity: str, college_id: int, binary_file,
+               batch_size: int = IMPORT_BATCH_SIZE, on_progress=None, mode: str = "insert") -> ImportResult:
+    """
+    Imports a CSV of `entity` rows for one college. Each batch is validated
+    and written in its own transaction; invalid rows are skipped and
+    reported with their line numbers. `on_progress(result)` is called after
+    every batch.
+
+    In 'upsert' and 'sync' mode rows are matched on the spec's key and only
+    new or changed rows are written. 'sync' then deletes the college's rows
+    that weren't in the file, unless some rows of the file were invalid.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}'. Expected one of {IMPORT_MODES}")
+    spec = IMPORT_SPECS[entity]
+    result = ImportResult(entity, mode)
+    header_map = None
+    if mode != "insert":
+        existing, duplicates = spec.existing_rows(db, college_id)
+        seen = {}  # key -> line of the row that claimed it
+
+    for fieldnames, first_line, rows in read_batches(binary_file, batch_size):
+        if header_map is None:
+            header_map = spec.header_map(fieldnames)
+        if not rows:
+            break
+
+        valid, errors = spec.validate(rows, header_map, college_id, first_line)
+        if mode == "insert":
+            inserts, updates = [values for _, values in valid], []
+        else:
+            inserts, updates, duplicate_errors = _plan_upsert(spec, valid, existing, seen, result)
+            errors = sorted(errors + duplicate_errors)
+        result.add_errors(errors)
+        try:
+            bulk_insert(db, spec.model, inserts)
+            bulk_update(db, spec.model, updates)
+            if inserts or updates:
+                record_change(db, spec.table, college_id, op="insert" if not updates else "update")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        result.rows_processed += len(rows)
+        result.inserted += len(inserts)
+        result.updated += len(updates)
+        if on_progress:
+            on_progress(result)
+
+    if mode == "sync":
+        if result.error_count:
+            logger.warning(f"Not deleting missing {entity} rows for college {college_id}: the file had invalid rows")
+        else:
+            missing = [row_id for key, (row_id, _) in existing.items() if key not in seen] + duplicates
+            try:
+                bulk_delete(db, spec.model, missing)
+                if missing:
+                    record_change(db, spec.table, college_id, op="delete")
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            result.deleted = len(missing)
+            if on_progress:
+                on_progress(result)
+
+    logger.info(
+        f"Imported {entity} rows for college {college_id} ({mode}) in {result.seconds:.2f}s: "
+        f"{result.inserted} inserted, {result.updated} updated, {result.unchanged} unchanged, "
+        f"{result.deleted} deleted of {result.rows_processed} ({result.error_count} errors)"
+    )
+    return result
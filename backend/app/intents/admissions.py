@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import models
-from app.intents.utils import get_college_by_name, _normalize_for_query
+from app.intents.utils import get_college_by_name, search_filter, unanswered
+from app.intents.snapshot import knowledge_snapshot, matches
 
 def handle_admission_query(params: dict, db: Session) -> str:
     college_name = params.get("college")
@@ -12,22 +13,25 @@ def handle_admission_query(params: dict, db: Session) -> str:
 
     college = get_college_by_name(db, college_name)
     if not college:
-        return f"Sorry, I couldn’t find a college named '{college_name}'."
+        return unanswered(f"Sorry, I couldn’t find a college named '{college_name}'.")
 
-    query = db.query(models.Admission).filter(models.Admission.college_id == college.id)
+    knowledge = knowledge_snapshot.college(college.id)
+    if knowledge is not None:
+        admissions = [a for a in knowledge.admissions if not course_name or matches(a.course_search, course_name)]
+    else:
+        query = db.query(models.Admission).filter(models.Admission.college_id == college.id)
 
-    if course_name:
-        # Normalize and filter by course if provided
-        normalized_course = course_name.lower().replace('.', '').replace(' ', '')
-        query = query.filter(_normalize_for_query(models.Admission.course).ilike(f"%{normalized_course}%"))
+        if course_name:
+            # Filter by course if provided, using the normalized search column
+            query = query.filter(search_filter(db, models.Admission.course_search, course_name))
 
-    admissions = query.all()
+        admissions = query.all()
 
     if not admissions:
         response = f"No admission information found for {college.name}"
         if course_name:
             response += f" for the {course_name} course."
-        return response
+        return unanswered(response)
 
     response_parts = [f"Admission details for {college.name}:"]
     for adm in admissions:
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app import changes
+from app.models import normalize_name
+
+# --- Configuration ---
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", 2048))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", 300))
+
+# Tables whose rows feed intent answers. A change to any of them drops the
+# cached answers for the affected college.
+INTENT_TABLES = {"fees", "faqs", "holidays", "admissions", "scholarships", "timetables", "departments"}
+
+
+def _normalize_param(value):
+    if isinstance(value, str):
+        return normalize_name(value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_param(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize_param(v)) for k, v in value.items()))
+    return str(value)
+
+
+class IntentCache:
+    """
+    LRU + TTL cache of intent responses, keyed by intent name and normalized
+    parameters. Entries are tracked per college so an admin write only drops
+    the answers that could have changed.
+    """
+
+    def __init__(self, max_size=INTENT_CACHE_SIZE, ttl=INTENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, college_id, response)
+        self._by_college = {}  # college_id -> set of keys
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(intent_name: str, params: dict):
+        return intent_name, _normalize_param(params or {})
+
+    def generation(self) -> int:
+        """
+        Changes whenever anything is invalidated. Capture it before computing
+        an answer and pass it to `put`, so an answer computed from data that
+        changed meanwhile isn't cached.
+        """
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, college_id, response, generation=None):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, college_id, response)
+            self._by_college.setdefault(college_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_college.get(entry[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_college[entry[1]]
+
+    def invalidate_college(self, college_id):
+        with self._lock:
+            self._generation += 1
+            for key in self._by_college.pop(college_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_college.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+intent_cache = IntentCache()
+
+
+@changes.subscribe
+def _invalidate_intent_cache(changed):
+    for change in changed:
+        # College renames and additions change which college a name resolves
+        # to (and every "couldn't find a college" answer), so drop everything.
+        if change.table == "colleges" or (change.table in INTENT_TABLES and change.college_id is None):
+            intent_cache.clear()
+            return
+    for college_id in {c.college_id for c in changed if c.table in INTENT_TABLES}:
+        intent_cache.invalidate_college(college_id)
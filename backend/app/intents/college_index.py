@@ -0,0 +1,102 @@
+import threading
+from collections import namedtuple
+
+from sqlalchemy.orm import Session
+
+from app import models, changes
+from app.models import normalize_name
+
+# Lightweight stand-in for a College row; handlers only need id and name.
+CollegeRef = namedtuple("CollegeRef", ["id", "name", "normalized"])
+
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class _IndexState:
+    """
+    Immutable snapshot of all college names, already normalized.
+    `refs` is ordered by id, and the n-gram postings hold positions into it,
+    so the lowest position is the same row `ORDER BY id ... LIMIT 1` would return.
+    """
+
+    def __init__(self, rows):
+        self.refs = [CollegeRef(id, name, normalize_name(name or "")) for id, name in rows]
+        self.exact = {}
+        self.postings = {}
+        for pos, ref in enumerate(self.refs):
+            self.exact.setdefault(ref.normalized, ref)
+            for gram in _ngrams(ref.normalized):
+                self.postings.setdefault(gram, []).append(pos)
+
+    def find(self, normalized: str) -> CollegeRef | None:
+        ref = self.exact.get(normalized)
+        if ref:
+            return ref
+
+        if len(normalized) < NGRAM_SIZE:
+            return next((r for r in self.refs if normalized in r.normalized), None)
+
+        # Intersect the shortest posting lists first, then confirm the
+        # candidates really contain the whole query as a substring.
+        lists = sorted((self.postings.get(g, []) for g in _ngrams(normalized)), key=len)
+        if not lists[0]:
+            return None
+        candidates = set(lists[0])
+        for positions in lists[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                return None
+        for pos in sorted(candidates):
+            if normalized in self.refs[pos].normalized:
+                return self.refs[pos]
+        return None
+
+
+class CollegeIndex:
+    """
+    Per-worker, lazily built index of college names. Lookups are served from
+    memory; the index is rebuilt on the next lookup after any college changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._state = None
+
+    def _get_state(self, db: Session) -> _IndexState:
+        state = self._state
+        if state is not None:
+            return state
+
+        generation = self._generation
+        rows = db.query(models.College.id, models.College.name).order_by(models.College.id).all()
+        state = _IndexState(rows)
+        with self._lock:
+            # Don't install a snapshot that was invalidated while loading.
+            if generation == self._generation:
+                self._state = state
+        return state
+
+    def lookup(self, db: Session, college_name: str) -> CollegeRef | None:
+        normalized = normalize_name(college_name)
+        if not normalized:
+            return None
+        return self._get_state(db).find(normalized)
+
+
+college_index = CollegeIndex()
+
+
+@changes.subscribe
+def _invalidate_on_college_change(changed):
+    if any(c.table == "colleges" for c in changed):
+        college_index.invalidate()
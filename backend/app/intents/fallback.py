@@ -0,0 +1,206 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Dialogflow gives up on a webhook call after about 5 seconds, so a handler
+# that hasn't answered within its budget is abandoned and the last
+# known-good answer is served instead.
+INTENT_TIMEOUT = float(os.getenv("INTENT_TIMEOUT", 4.0))
+# Per-intent overrides, e.g. "FAQ Query=2.5,Fee Deadline=1.5"
+INTENT_TIMEOUTS = os.getenv("INTENT_TIMEOUTS", "")
+FALLBACK_STORE_SIZE = int(os.getenv("FALLBACK_STORE_SIZE", 10000))
+# Consecutive timeouts or database errors that open the circuit breaker,
+# and how long it stays open before letting one request through to test
+# the database again.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 30))
+# Most intent lookups a worker runs in threads at once, counting ones the
+# webhook stopped waiting for: their threads keep running (and holding DB
+# connections) after anyio has given their thread pool slot back. Past it,
+# the fallback is served right away. Defaults to twice DB_THREADPOOL_SIZE.
+INTENT_MAX_THREADS = int(os.getenv("INTENT_MAX_THREADS", 32))
+
+
+def _parse_budgets(spec: str) -> dict:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        intent, _, seconds = item.rpartition("=")
+        if not intent:
+            raise ValueError(f"INTENT_TIMEOUTS entries must look like 'Intent Name=seconds', got '{item}'")
+        budgets[intent.strip()] = float(seconds)
+    return budgets
+
+
+_budgets = _parse_budgets(INTENT_TIMEOUTS)
+
+
+def intent_budget(intent_name: str) -> float:
+    return _budgets.get(intent_name, INTENT_TIMEOUT)
+
+
+class LastGoodAnswers:
+    """
+    Per-worker LRU store of the latest answer each handler gave, keyed like
+    the intent cache. Unlike the cache it is never invalidated: a stale
+    answer is only served when a fresh one can't be had in time.
+    """
+
+    def __init__(self, max_size=FALLBACK_STORE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, college_id, response_text)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, college_id, response_text):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), college_id, response_text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CircuitBreaker:
+    """
+    Stops sending intent lookups to a database that keeps timing out or
+    failing. After `failure_threshold` consecutive failures the breaker
+    opens; every `reset_seconds` after that one request is let through
+    (half-open) and its outcome closes or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS,
+                 on_change=None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # A trial that never reports back (say it was answered from the
+            # intent cache) doesn't hold up the next one.
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic()
+                self._set(self.HALF_OPEN)
+                return True  # the trial request
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._set(self.OPEN)
+
+    def _set(self, state):
+        if state != self.state:
+            logger.warning(f"Intent circuit breaker {self.state} -> {state}")
+        self.state = state
+        if self.on_change:
+            self.on_change(state)
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+        }
+
+
+class IntentSlot:
+    """
+    One of IntentSlots' permits, held from the webhook until the lookup's
+    thread finishes, or given back at once if the webhook gives up before
+    the thread started.
+    """
+
+    def __init__(self, release):
+        self._release = release
+        self._lock = threading.Lock()
+        self._state = "waiting"
+
+    def run(self, func, *args):
+        """
+        Runs `func` in the calling (worker) thread, unless the webhook has
+        already abandoned this slot; then returns None without running it.
+        """
+        with self._lock:
+            if self._state != "waiting":
+                return None
+            self._state = "running"
+        try:
+            return func(*args)
+        finally:
+            self._finish()
+
+    def abandon(self):
+        with self._lock:
+            if self._state == "waiting":
+                self._finish_locked()
+
+    def _finish(self):
+        with self._lock:
+            self._finish_locked()
+
+    def _finish_locked(self):
+        if self._state != "done":
+            self._state = "done"
+            self._release()
+
+
+class IntentSlots:
+    """
+    Bounds the intent lookups running in threads, including abandoned ones.
+    """
+
+    def __init__(self, size=INTENT_MAX_THREADS):
+        self.size = size
+        self._semaphore = threading.BoundedSemaphore(size) if size > 0 else None
+
+    def try_acquire(self) -> IntentSlot | None:
+        if self._semaphore is None:
+            return IntentSlot(lambda: None)
+        if not self._semaphore.acquire(blocking=False):
+            return None
+        return IntentSlot(self._semaphore.release)
+
+    def in_use(self) -> int:
+        return self.size - self._semaphore._value if self._semaphore is not None else 0
+
+
+last_good_answers = LastGoodAnswers()
+intent_slots = IntentSlots()
+intent_breaker = CircuitBreaker(
+    on_change=lambda state: metrics.INTENT_BREAKER_OPEN.set(0 if state == CircuitBreaker.CLOSED else 1)
+)
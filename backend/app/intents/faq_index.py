@@ -0,0 +1,193 @@
+import math
+import os
+import re
+import threading
+from collections import namedtuple, Counter
+
+from sqlalchemy.orm import Session
+
+from app import models, changes
+
+# BM25 parameters and the minimum share of the question's (IDF-weighted)
+# terms an FAQ must contain before we're willing to answer with it.
+BM25_K1 = 1.5
+BM25_B = 0.75
+FAQ_MIN_CONFIDENCE = float(os.getenv("FAQ_MIN_CONFIDENCE", 0.5))
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did",
+    "i", "me", "my", "we", "our", "you", "your", "it", "its", "this", "that",
+    "of", "in", "on", "at", "to", "for", "by", "with", "from", "and", "or",
+    "what", "which", "who", "how", "when", "where", "can", "could", "there",
+    "please", "tell", "about", "any", "much", "many",
+}
+
+FAQHit = namedtuple("FAQHit", ["faq_id", "question", "answer", "score", "confidence"])
+
+
+def _stem(term: str) -> str:
+    # Just enough stemming to match simple plurals ('fees' -> 'fee').
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercases text, joins dotted abbreviations ('B.Tech' -> 'btech') and
+    splits it into words, dropping stopwords.
+    """
+    words = TOKEN_RE.findall(text.lower().replace('.', ''))
+    return [_stem(w) for w in words if len(w) > 1 and w not in STOPWORDS]
+
+
+class _CollegeFAQIndex:
+    """
+    Inverted index over one college's FAQ questions.
+    """
+
+    def __init__(self):
+        self.postings = {}  # term -> {faq_id: term frequency}
+        self.docs = {}  # faq_id -> (question, answer, length)
+        self.total_length = 0
+
+    def add(self, faq_id, question, answer):
+        terms = Counter(tokenize(question or ""))
+        length = sum(terms.values())
+        self.docs[faq_id] = (question, answer, length)
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[faq_id] = tf
+
+    def remove(self, faq_id):
+        doc = self.docs.pop(faq_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc[2]
+        for term in set(tokenize(doc[0] or "")):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(faq_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def _idf(self, term):
+        # Terms no FAQ uses are weighted like the rarest known term, so one
+        # unfamiliar word doesn't outweigh the rest of the question.
+        n = len(self.docs)
+        df = max(len(self.postings.get(term, ())), 1)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query_terms, k):
+        if not self.docs or not query_terms:
+            return []
+
+        avg_length = self.total_length / len(self.docs) or 1
+        idfs = {term: self._idf(term) for term in query_terms}
+        total_idf = sum(idfs.values())
+
+        scores = {}
+        matched_idf = {}
+        for term, idf in idfs.items():
+            for faq_id, tf in self.postings.get(term, {}).items():
+                length = self.docs[faq_id][2]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[faq_id] = scores.get(faq_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+                matched_idf[faq_id] = matched_idf.get(faq_id, 0.0) + idf
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [
+            FAQHit(faq_id, self.docs[faq_id][0], self.docs[faq_id][1], score, matched_idf[faq_id] / total_idf)
+            for faq_id, score in ranked
+        ]
+
+
+class FAQIndex:
+    """
+    Per-worker BM25 retrieval over FAQ questions. A college's index is built
+    on its first query; afterwards committed FAQ changes are applied one row
+    at a time, so lookups cost O(query terms) instead of a scan of the FAQs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colleges = {}  # college_id -> _CollegeFAQIndex
+        self._owner = {}  # faq_id -> college_id, for indexed FAQs
+        self._pending = set()  # faq ids changed since they were indexed
+
+    def invalidate(self):
+        with self._lock:
+            self._colleges.clear()
+            self._owner.clear()
+            self._pending.clear()
+
+    def mark_changed(self, faq_ids):
+        with self._lock:
+            self._pending.update(faq_ids)
+
+    def _apply_pending(self, db: Session):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+
+        rows = (
+            db.query(models.FAQ.id, models.FAQ.college_id, models.FAQ.question, models.FAQ.answer)
+            .filter(models.FAQ.id.in_(pending))
+            .all()
+        )
+        with self._lock:
+            for faq_id in pending:
+                owner = self._owner.pop(faq_id, None)
+                if owner in self._colleges:
+                    self._colleges[owner].remove(faq_id)
+            for faq_id, college_id, question, answer in rows:
+                index = self._colleges.get(college_id)
+                if index is not None:
+                    index.add(faq_id, question, answer)
+                    self._owner[faq_id] = college_id
+
+    def _college_index(self, db: Session, college_id) -> _CollegeFAQIndex:
+        index = self._colleges.get(college_id)
+        if index is not None:
+            return index
+
+        rows = (
+            db.query(models.FAQ.id, models.FAQ.question, models.FAQ.answer)
+            .filter(models.FAQ.college_id == college_id)
+            .all()
+        )
+        index = _CollegeFAQIndex()
+        for faq_id, question, answer in rows:
+            index.add(faq_id, question, answer)
+        with self._lock:
+            if college_id not in self._colleges:
+                self._colleges[college_id] = index
+                self._owner.update((faq_id, college_id) for faq_id, _, _ in rows)
+            return self._colleges[college_id]
+
+    def search(self, db: Session, college_id, query_text: str, k: int = 3,
+               min_confidence: float = FAQ_MIN_CONFIDENCE) -> list[FAQHit]:
+        """
+        Returns up to `k` FAQs for the college ranked by BM25, keeping only
+        those whose confidence reaches `min_confidence`.
+        """
+        self._apply_pending(db)
+        index = self._college_index(db, college_id)
+        query_terms = set(tokenize(query_text))
+        with self._lock:
+            hits = index.search(query_terms, k)
+        return [hit for hit in hits if hit.confidence >= min_confidence]
+
+
+faq_index = FAQIndex()
+
+
+@changes.subscribe
+def _track_faq_changes(changed):
+    faq_ids = [c.row_id for c in changed if c.table == "faqs" and c.row_id is not None]
+    if any(c.table == "faqs" and c.row_id is None for c in changed):
+        faq_index.invalidate()
+    elif faq_ids:
+        faq_index.mark_changed(faq_ids)
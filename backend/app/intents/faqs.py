@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app import models
-from app.intents.utils import get_college_by_name, _normalize_for_query
+from app.intents.faq_index import faq_index
+from app.intents.utils import get_college_by_name, unanswered
+from app.intents.snapshot import knowledge_snapshot
 
 def handle_faq_query(params: dict, db: Session) -> str:
     college_name = params.get("college")
@@ -15,23 +15,16 @@ def handle_faq_query(params: dict, db: Session) -> str:
 
     college = get_college_by_name(db, college_name)
     if not college:
-        return f"Sorry, I couldn’t find a college named '{college_name}'."
+        return unanswered(f"Sorry, I couldn’t find a college named '{college_name}'.")
 
-    # Normalize the user's query text
-    normalized_query = query_text.lower().replace('.', '').replace(' ', '').replace('?', '')
+    # Find the most relevant FAQ using the college's BM25 index
+    knowledge = knowledge_snapshot.college(college.id)
+    if knowledge is not None:
+        hits = knowledge.search_faqs(query_text, k=1)
+    else:
+        hits = faq_index.search(db, college.id, query_text, k=1)
 
-    # Find the most relevant FAQ using the normalized search
-    faq = (
-        db.query(models.FAQ)
-        .filter(
-            models.FAQ.college_id == college.id,
-            _normalize_for_query(models.FAQ.question).ilike(f"%{normalized_query}%"),
-        )
-        .first()
-    )
-
-    if not faq:
-        return f"I'm sorry, I couldn't find an answer for '{query_text}' at {college.name}. Please try rephrasing your question."
-
-    return faq.answer
+    if not hits:
+        return unanswered(f"I'm sorry, I couldn't find an answer for '{query_text}' at {college.name}. Please try rephrasing your question.")
 
+    return hits[0].answer
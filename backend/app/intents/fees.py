@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import models
-from app.intents.utils import get_college_by_name, _normalize_for_query
+from app.intents.utils import get_college_by_name, search_filter, unanswered
+from app.intents.snapshot import knowledge_snapshot, matches
 
 def handle_fee_deadline(params: dict, db: Session) -> str:
     """
@@ -19,24 +20,24 @@ def handle_fee_deadline(params: dict, db: Session) -> str:
 
     college = get_college_by_name(db, college_name)
     if not college:
-        return f"Sorry, I couldn't find any information for a college named '{college_name}'."
-
-    # Normalize the user's input for the course
-    normalized_course = course_name.lower().replace('.', '').replace(' ', '')
-
-    # Query the Fee table using the normalized comparison
-    fee_info = (
-        db.query(models.Fee)
-        .filter(
-            models.Fee.college_id == college.id,
-            # FIX: Use the correct column name 'program' instead of 'course_name'
-            _normalize_for_query(models.Fee.program).ilike(f"%{normalized_course}%"),
+        return unanswered(f"Sorry, I couldn't find any information for a college named '{college_name}'.")
+
+    knowledge = knowledge_snapshot.college(college.id)
+    if knowledge is not None:
+        fee_info = next((fee for fee in knowledge.fees if matches(fee.program_search, course_name)), None)
+    else:
+        # Query the Fee table using the normalized search column
+        fee_info = (
+            db.query(models.Fee)
+            .filter(
+                models.Fee.college_id == college.id,
+                search_filter(db, models.Fee.program_search, course_name),
+            )
+            .first()
         )
-        .first()
-    )
 
     if not fee_info or not fee_info.deadline:
-        return f"I'm sorry, I don't have the fee deadline information for the {course_name} course at {college.name}."
+        return unanswered(f"I'm sorry, I don't have the fee deadline information for the {course_name} course at {college.name}.")
 
     formatted_date = fee_info.deadline.strftime("%B %d, %Y")
     # FIX: Use the correct attribute 'program' in the response
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import models
-from app.intents.utils import get_college_by_name, _normalize_for_query
+from app.intents.utils import get_college_by_name, search_filter, unanswered
+from app.intents.snapshot import knowledge_snapshot, matches
 
 def handle_scholarship_query(params: dict, db: Session) -> str:
     college_name = params.get("college")
@@ -12,24 +13,28 @@ def handle_scholarship_query(params: dict, db: Session) -> str:
 
     college = get_college_by_name(db, college_name)
     if not college:
-        return f"Sorry, I couldn't find a college named '{college_name}'."
-
-    query = db.query(models.Scholarship).filter(models.Scholarship.college_id == college.id)
+        return unanswered(f"Sorry, I couldn't find a college named '{college_name}'.")
 
     # FIX 1: Handle when 'course' is a list from Dialogflow
-    if course_param:
-        # If it's a list, take the first element; otherwise, use it as is.
-        course_name = course_param[0] if isinstance(course_param, list) else course_param
-        
-        # Normalize and filter by course eligibility
-        normalized_course = course_name.lower().replace('.', '').replace(' ', '')
-        # FIX 2: Use the correct column name 'eligibility'
-        query = query.filter(_normalize_for_query(models.Scholarship.eligibility).ilike(f"%{normalized_course}%"))
+    # If it's a list, take the first element; otherwise, use it as is.
+    course_name = course_param[0] if isinstance(course_param, list) and course_param else course_param
+
+    knowledge = knowledge_snapshot.college(college.id)
+    if knowledge is not None:
+        scholarships = [
+            s for s in knowledge.scholarships if not course_name or matches(s.eligibility_search, course_name)
+        ]
+    else:
+        query = db.query(models.Scholarship).filter(models.Scholarship.college_id == college.id)
+
+        if course_name:
+            # Filter by course eligibility, using the normalized search column
+            query = query.filter(search_filter(db, models.Scholarship.eligibility_search, course_name))
 
-    scholarships = query.all()
+        scholarships = query.all()
 
     if not scholarships:
-        return f"I couldn't find any scholarship information for {college.name} matching your criteria."
+        return unanswered(f"I couldn't find any scholarship information for {college.name} matching your criteria.")
 
     response_parts = [f"Here are the scholarships available at {college.name}:"]
     for sch in scholarships:
@@ -0,0 +1,271 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app import changes, models
+from app.database import SessionLocal
+from app.intents.cache import INTENT_TABLES, intent_cache
+from app.intents.college_index import _IndexState, CollegeRef
+from app.intents.faq_index import _CollegeFAQIndex, tokenize, FAQ_MIN_CONFIDENCE
+from app.models import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# With INTENT_SNAPSHOT=1 each worker loads all intent data at startup and the
+# webhook answers from memory. A background thread polls the data version
+# every SNAPSHOT_CHECK_INTERVAL seconds and reloads after any write. Writers
+# only bump the version when it is set, so set it on every process.
+INTENT_SNAPSHOT = os.getenv("INTENT_SNAPSHOT", "0").lower() in ("1", "true", "yes")
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SNAPSHOT_CHECK_INTERVAL", 2))
+
+# Tables whose writes bump the data version
+VERSIONED_TABLES = INTENT_TABLES | {"colleges"}
+
+# Field names match the model attributes the handlers format into answers.
+FeeRow = namedtuple("FeeRow", ["id", "program", "program_search", "year", "deadline"])
+HolidayRow = namedtuple("HolidayRow", ["id", "holiday_name", "start_date", "end_date"])
+AdmissionRow = namedtuple("AdmissionRow", ["id", "course", "course_search", "eligibility", "process", "last_date"])
+ScholarshipRow = namedtuple("ScholarshipRow", ["id", "name", "eligibility", "eligibility_search", "amount", "deadline"])
+TimetableRow = namedtuple("TimetableRow", ["id", "course", "course_search", "year", "semester", "timetable_url"])
+
+_SOURCES = [
+    ("fees", models.Fee, FeeRow),
+    ("holidays", models.Holiday, HolidayRow),
+    ("admissions", models.Admission, AdmissionRow),
+    ("scholarships", models.Scholarship, ScholarshipRow),
+    ("timetables", models.Timetable, TimetableRow),
+]
+
+
+class CollegeKnowledge:
+    """
+    Everything the intent handlers need about one college, as tuples of
+    namedtuples ordered by id (the order the SQL queries returned).
+    """
+    __slots__ = ("fees", "holidays", "admissions", "scholarships", "timetables", "faqs")
+
+    def __init__(self):
+        self.fees = self.holidays = self.admissions = self.scholarships = self.timetables = ()
+        self.faqs = _CollegeFAQIndex()
+
+    def search_faqs(self, query_text: str, k: int = 3, min_confidence: float = FAQ_MIN_CONFIDENCE):
+        hits = self.faqs.search(set(tokenize(query_text)), k)
+        return [hit for hit in hits if hit.confidence >= min_confidence]
+
+
+def matches(search_value: str | None, value: str) -> bool:
+    """
+    In-memory equivalent of `search_filter`: a '%value%' match on a
+    normalized search column.
+    """
+    return normalize_name(value) in (search_value or "")
+
+
+def _deep_size(obj, seen=None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_size(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    elif hasattr(obj, "__dict__"):
+        size += _deep_size(vars(obj), seen)
+    return size
+
+
+class Snapshot:
+    """
+    One immutable load of the intent data. Readers keep using the snapshot
+    they started with while a reload builds the next one.
+    """
+
+    def __init__(self, version, colleges: _IndexState, knowledge: dict, seconds: float):
+        self.version = version
+        self.colleges = colleges
+        self.knowledge = knowledge  # college_id -> CollegeKnowledge
+        self.loaded_at = time.time()
+        self.load_seconds = seconds
+        self.memory = {}  # filled in by load()
+
+    @classmethod
+    def load(cls, db: Session) -> "Snapshot":
+        started = time.perf_counter()
+        # Read the version first: a write landing during the load bumps it
+        # again, so the next check reloads.
+        version = db.scalar(select(models.DataVersion.version).where(models.DataVersion.id == 1))
+        rows = db.execute(select(models.College.id, models.College.name).order_by(models.College.id)).all()
+        colleges = _IndexState(rows)
+        knowledge = {ref.id: CollegeKnowledge() for ref in colleges.refs}
+
+        for attr, model, row_type in _SOURCES:
+            grouped = {}
+            columns = [model.college_id] + [getattr(model, name) for name in row_type._fields]
+            for college_id, *values in db.execute(select(*columns).order_by(model.id)):
+                grouped.setdefault(college_id, []).append(row_type(*values))
+            for college_id, items in grouped.items():
+                if college_id in knowledge:
+                    setattr(knowledge[college_id], attr, tuple(items))
+
+        faqs = select(models.FAQ.college_id, models.FAQ.id, models.FAQ.question, models.FAQ.answer).order_by(models.FAQ.id)
+        for college_id, faq_id, question, answer in db.execute(faqs):
+            if college_id in knowledge:
+                knowledge[college_id].faqs.add(faq_id, question, answer)
+
+        snapshot = cls(version, colleges, knowledge, time.perf_counter() - started)
+        # Measured once here, off the request path: walking every college's
+        # data is as much work as the load itself.
+        snapshot.memory = snapshot._measure()
+        return snapshot
+
+    def _measure(self) -> dict:
+        per_college = [_deep_size(k) for k in self.knowledge.values()]
+        names = _deep_size(self.colleges)
+        return {
+            "names_bytes": names,
+            "total_bytes": sum(per_college) + names,
+            "largest_college_bytes": max(per_college, default=0),
+        }
+
+
+class KnowledgeSnapshot:
+    """
+    Per-worker holder of the current Snapshot, with a background thread that
+    reloads it whenever the database's data version moves.
+    """
+
+    def __init__(self, enabled=INTENT_SNAPSHOT, interval=SNAPSHOT_CHECK_INTERVAL, session_factory=SessionLocal):
+        self.enabled = enabled
+        self.interval = interval
+        self.session_factory = session_factory
+        self._current = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.reloads = 0
+
+    @property
+    def current(self) -> Snapshot | None:
+        return self._current if self.enabled else None
+
+    def college(self, college_id) -> CollegeKnowledge | None:
+        """
+        The college's data, or None when handlers should query the database.
+        """
+        snapshot = self.current
+        if snapshot is None:
+            return None
+        return snapshot.knowledge.get(college_id) or CollegeKnowledge()
+
+    def lookup_college(self, college_name: str) -> CollegeRef | None:
+        normalized = normalize_name(college_name)
+        return self._current.colleges.find(normalized) if normalized else None
+
+    def reload(self):
+        db = self.session_factory()
+        try:
+            snapshot = Snapshot.load(db)
+        finally:
+            db.close()
+        self._current = snapshot  # a single reference swap; readers never see a partial load
+        self.reloads += 1
+        intent_cache.clear()
+        logger.info(f"Loaded intent snapshot v{snapshot.version}: {len(snapshot.knowledge)} colleges "
+                    f"in {snapshot.load_seconds:.2f}s")
+
+    def _stored_version(self):
+        db = self.session_factory()
+        try:
+            return db.scalar(select(models.DataVersion.version).where(models.DataVersion.id == 1))
+        finally:
+            db.close()
+
+    def wake(self):
+        """
+        Checks the version now instead of at the next interval.
+        """
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                if self._stored_version() != self._current.version:
+                    self.reload()
+            except Exception as e:
+                logger.error(f"Intent snapshot reload failed: {e}")
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self.reload()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="intent-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(5)
+        self._thread = None
+
+    def stats(self) -> dict:
+        snapshot = self.current
+        if snapshot is None:
+            return {"enabled": self.enabled, "loaded": False}
+        return {
+            "enabled": True,
+            "loaded": True,
+            "version": snapshot.version,
+            "colleges": len(snapshot.knowledge),
+            "loaded_at": snapshot.loaded_at,
+            "load_seconds": round(snapshot.load_seconds, 3),
+            "reloads": self.reloads,
+            **snapshot.memory,
+        }
+
+
+knowledge_snapshot = KnowledgeSnapshot()
+
+
+@changes.subscribe
+def _reload_snapshot_on_change(committed):
+    # This worker's own writes are picked up right away; other workers'
+    # within SNAPSHOT_CHECK_INTERVAL.
+    if knowledge_snapshot.current is not None and any(c.table in VERSIONED_TABLES for c in committed):
+        knowledge_snapshot.wake()
+
+
+# ---------- Data Version ----------
+# Each bump locks the single data_version row, serializing every content
+# write, so it is only done when INTENT_SNAPSHOT is set. Set it for every
+# process that writes (workers, import scripts) in a snapshot deployment.
+def _bump_data_version(session):
+    session.flush()  # collect the ORM changes this commit is about to write
+    pending = session.info.get("pending_changes") or ()
+    if any(change.table in VERSIONED_TABLES for change in pending):
+        session.execute(
+            update(models.DataVersion.__table__)
+            .where(models.DataVersion.id == 1)
+            .values(version=models.DataVersion.version + 1)
+        )
+
+
+if INTENT_SNAPSHOT:
+    event.listen(Session, "before_commit", _bump_data_version)
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app import models
-from app.intents.utils import get_college_by_name, _normalize_for_query
+from app.intents.utils import get_college_by_name, search_filter, unanswered
+from app.intents.snapshot import knowledge_snapshot, matches
 
 def handle_timetable_query(params: dict, db: Session) -> str:
     college_name = params.get("college")
@@ -13,22 +14,29 @@ def handle_timetable_query(params: dict, db: Session) -> str:
 
     college = get_college_by_name(db, college_name)
     if not college:
-        return f"Sorry, I couldn't find a college named '{college_name}'."
+        return unanswered(f"Sorry, I couldn't find a college named '{college_name}'.")
 
-    query = db.query(models.Timetable).filter(models.Timetable.college_id == college.id)
+    knowledge = knowledge_snapshot.college(college.id)
+    if knowledge is not None:
+        timetables = [
+            tt for tt in knowledge.timetables
+            if (not course_name or matches(tt.course_search, course_name))
+            and (not semester or tt.semester == int(semester))
+        ]
+    else:
+        query = db.query(models.Timetable).filter(models.Timetable.college_id == college.id)
 
-    if course_name:
-        # Normalize and filter by course
-        normalized_course = course_name.lower().replace('.', '').replace(' ', '')
-        query = query.filter(_normalize_for_query(models.Timetable.course).ilike(f"%{normalized_course}%"))
+        if course_name:
+            # Filter by course, using the normalized search column
+            query = query.filter(search_filter(db, models.Timetable.course_search, course_name))
 
-    if semester:
-        query = query.filter(models.Timetable.semester == int(semester))
+        if semester:
+            query = query.filter(models.Timetable.semester == int(semester))
 
-    timetables = query.all()
+        timetables = query.all()
 
     if not timetables:
-        return f"I couldn't find any timetable information for {college.name} matching your criteria."
+        return unanswered(f"I couldn't find any timetable information for {college.name} matching your criteria.")
 
     response_parts = [f"Here are the timetables for {college.name}:"]
     for tt in timetables:
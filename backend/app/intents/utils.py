@@ -1,6 +1,19 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, table, column
 from app import models
+from app.models import normalize_name, fts_table_name
+from app.intents.college_index import college_index, CollegeRef
+from app.intents.snapshot import knowledge_snapshot
+
+class Unanswered(str):
+    """
+    A response that tells the user we had no answer (unknown college, no
+    matching rows). It is still a plain string everywhere else; the webhook
+    only uses the type to count unanswered queries.
+    """
+
+def unanswered(text: str) -> Unanswered:
+    return Unanswered(text)
 
 def _normalize_for_query(column):
     """
@@ -8,15 +21,34 @@ def _normalize_for_query(column):
     """
     return func.lower(func.replace(func.replace(column, '.', ''), ' ', ''))
 
-def get_college_by_name(db: Session, college_name: str) -> models.College | None:
+def search_filter(db: Session, search_column, value: str):
+    """
+    Creates a '%value%' filter on one of the models' normalized search columns.
+    On Postgres this is served by the pg_trgm index; on SQLite it goes through
+    the column's FTS5 trigram table.
+    """
+    pattern = f"%{normalize_name(value)}%"
+    if db.get_bind().dialect.name == "sqlite":
+        model = search_column.class_
+        fts = table(fts_table_name(model.__tablename__, search_column.key), column("rowid"), column(search_column.key))
+        return model.id.in_(select(fts.c.rowid).where(fts.c[search_column.key].like(pattern)))
+    return search_column.like(pattern)
+
+def get_college_by_name(db: Session, college_name: str) -> CollegeRef | None:
     """
     Finds a college by its name, ignoring case, spaces, and periods.
+    Results are served from the intent snapshot or the in-memory college
+    index and remembered on the session, so the intent handler and the
+    webhook logger share one lookup.
     """
     if not college_name:
         return None
-    
-    normalized_name = college_name.lower().replace('.', '').replace(' ', '')
-    
-    return db.query(models.College).filter(
-        _normalize_for_query(models.College.name).ilike(f"%{normalized_name}%")
-    ).first()
+
+    lookups = db.info.setdefault("college_lookups", {})
+    normalized_name = normalize_name(college_name)
+    if normalized_name not in lookups:
+        if knowledge_snapshot.current is not None:
+            lookups[normalized_name] = knowledge_snapshot.lookup_college(college_name)
+        else:
+            lookups[normalized_name] = college_index.lookup(db, college_name)
+    return lookups[normalized_name]
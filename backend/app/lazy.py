@@ -0,0 +1,33 @@
+import threading
+
+import anyio
+
+
+class LazyASGIApp:
+    """
+    ASGI app that is built by `factory()` on its first request, so a heavy
+    optional subsystem doesn't slow down worker startup. Mount it like the
+    real app; `routes` is forwarded so `url_for` works through the mount.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._app = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self.factory()
+        return self._app
+
+    @property
+    def routes(self):
+        return self._get().routes
+
+    async def __call__(self, scope, receive, send):
+        app = self._app
+        if app is None:
+            app = await anyio.to_thread.run_sync(self._get)
+        await app(scope, receive, send)
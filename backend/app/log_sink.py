@@ -0,0 +1,196 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import insert, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", 10000))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 500))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))
+# What to do when the buffer is full: 'drop_oldest', 'drop_newest' or 'block'
+# (wait up to LOG_BLOCK_TIMEOUT seconds for room, then drop the new record).
+LOG_OVERFLOW_POLICY = os.getenv("LOG_OVERFLOW_POLICY", "drop_oldest")
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", 0.5))
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+def rollup_rows(batch) -> list[dict]:
+    """
+    Aggregates log records into per (college, intent, hour) rollup rows.
+    """
+    buckets = {}
+    for record in batch:
+        hour = record["timestamp"].replace(minute=0, second=0, microsecond=0)
+        key = (record.get("college_id") or 0, record.get("intent") or "", hour)
+        latency = record.get("latency_ms") or 0.0
+        row = buckets.get(key)
+        if row is None:
+            row = buckets[key] = dict(college_id=key[0], intent=key[1], hour=hour, queries=0,
+                                      unanswered=0, latency_ms_total=0.0, latency_ms_max=0.0)
+        row["queries"] += 1
+        row["unanswered"] += 0 if record.get("answered", True) else 1
+        row["latency_ms_total"] += latency
+        row["latency_ms_max"] = max(row["latency_ms_max"], latency)
+    return list(buckets.values())
+
+
+def upsert_rollups(db, rows):
+    """
+    Adds `rows` onto the stored rollups with INSERT ... ON CONFLICT DO UPDATE,
+    so concurrent workers can increment the same bucket safely.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt, greatest = postgresql.insert(models.LogRollup), func.greatest
+    elif dialect == "sqlite":
+        stmt, greatest = sqlite.insert(models.LogRollup), func.max
+    else:
+        logger.warning(f"Log rollups are not supported on {dialect}")
+        return
+    table = models.LogRollup
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["college_id", "intent", "hour"],
+        set_={
+            "queries": table.queries + stmt.excluded.queries,
+            "unanswered": table.unanswered + stmt.excluded.unanswered,
+            "latency_ms_total": table.latency_ms_total + stmt.excluded.latency_ms_total,
+            "latency_ms_max": greatest(table.latency_ms_max, stmt.excluded.latency_ms_max),
+        },
+    )
+    db.execute(stmt, rows)
+
+
+class LogSink:
+    """
+    Write-behind buffer for webhook conversation logs. Records are queued in
+    memory and a background thread writes them as multi-row INSERTs once
+    `batch_size` records are waiting or `flush_interval` seconds have passed.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_size=LOG_BUFFER_SIZE, batch_size=LOG_BATCH_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, policy=LOG_OVERFLOW_POLICY, block_timeout=LOG_BLOCK_TIMEOUT):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log overflow policy '{policy}'. Expected one of {OVERFLOW_POLICIES}")
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "failed": 0}
+
+    # --- Producer side ---
+    def submit(self, record: dict):
+        """
+        Queues one `Log` row (a dict of column values). Without a running
+        flusher thread the record is written immediately.
+        """
+        if self._thread is None:
+            self._write([record])
+            return
+
+        with self._cond:
+            self.stats["submitted"] += 1
+            if len(self._buffer) >= self.max_size:
+                if self.policy == "drop_newest":
+                    self.stats["dropped"] += 1
+                    return
+                if self.policy == "drop_oldest":
+                    self._buffer.popleft()
+                    self.stats["dropped"] += 1
+                elif not self._cond.wait_for(lambda: len(self._buffer) < self.max_size, self.block_timeout):
+                    self.stats["dropped"] += 1
+                    return
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+
+    # --- Flusher side ---
+    def _take_batch(self):
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        self._cond.notify_all()  # wake producers blocked on a full buffer
+        return batch
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.Log), batch)
+            upsert_rollups(db, rollup_rows(batch))
+            db.commit()
+            self.stats["written"] += len(batch)
+        except Exception as e:
+            db.rollback()
+            self.stats["failed"] += len(batch)
+            logger.error(f"Failed to write {len(batch)} log records: {e}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    max(deadline - time.monotonic(), 0),
+                )
+                batch = self._take_batch()
+                stopping = self._stopping and not self._buffer
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def flush(self):
+        """
+        Writes everything currently buffered, on the calling thread.
+        """
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stops the flusher thread after it has written out the buffer.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+
+log_sink = LogSink()
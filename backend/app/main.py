@@ -1,17 +1,28 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Header, APIRouter, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Header, Query, APIRouter, status
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.responses import JSONResponse
+from starlette.applications import Starlette
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import anyio
 import logging
 import os
+import time
 
-from app.database import Base, engine, get_db
+from app.database import engine, SessionLocal, get_db, get_read_db, run_in_db_thread, pool_health, pool_stats, replicas
 from app import models, schemas, auth
-from app.admin import setup_admin
+from app.filters import filter_logs
+from app.log_sink import log_sink
+from app import import_jobs, metrics, profiling
+from app.change_bus import change_bus
+from app.lazy import LazyASGIApp
+from app.replicas import ReadYourWritesMiddleware
+from app.schema import create_schema
 # IMPORT THE NEW ROUTER
-from app.routers import uploads
+from app.routers import uploads, exports, analytics
 
 # Import intent handlers
 from app.intents.fees import handle_fee_deadline
@@ -20,10 +31,17 @@ from app.intents.faqs import handle_faq_query
 from app.intents.admissions import handle_admission_query
 from app.intents.scholarships import handle_scholarship_query
 from app.intents.timetable import handle_timetable_query
+from app.intents.utils import get_college_by_name, unanswered, Unanswered
+from app.intents.cache import intent_cache
+from app.intents.snapshot import knowledge_snapshot
+from app.intents.fallback import intent_budget, intent_breaker, intent_slots, last_good_answers
 
 # --- Environment Variables ---
 DIALOGFLOW_SECRET = os.getenv("DIALOGFLOW_SECRET")
 ADMIN_SECRET_KEY = os.getenv("ADMIN_SECRET_KEY", "default-secret-for-dev")
+# Set to 0 when `python -m app.schema` runs as a separate deploy step, so
+# workers start without DDL introspection.
+SCHEMA_AUTO_CREATE = os.getenv("SCHEMA_AUTO_CREATE", "1").lower() in ("1", "true", "yes")
 
 # ---------- Logging ----------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
@@ -40,8 +58,26 @@ INTENT_HANDLERS = {
 }
 
 # ---------- App Setup ----------
-Base.metadata.create_all(bind=engine)
-app = FastAPI(title="College Chatbot API", version="1.0.0")
+if SCHEMA_AUTO_CREATE:
+    create_schema(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers are started per worker process, after any fork.
+    log_sink.start()
+    pool_health.start()
+    replicas.start()
+    await run_in_db_thread(knowledge_snapshot.start)
+    change_bus.start()
+    yield
+    import_jobs.shutdown()
+    change_bus.stop()
+    knowledge_snapshot.stop()
+    log_sink.stop()
+    pool_health.stop()
+    replicas.stop()
+
+app = FastAPI(title="College Chatbot API", version="1.0.0", lifespan=lifespan)
 
 # This must be added for the SQLAdmin dashboard login to work.
 app.add_middleware(SessionMiddleware, secret_key=ADMIN_SECRET_KEY)
@@ -61,8 +97,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Setup SQLAdmin (Dashboard)
-setup_admin(app, engine)
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Outermost, so it times the whole request including the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+for instrumented in [engine, *replicas.engines]:
+    metrics.instrument_engine(instrumented)
+    profiling.instrument_engine(instrumented)
+if profiling.SQL_PROFILE:
+    app.add_middleware(profiling.SQLProfileMiddleware)
+
+# Setup SQLAdmin (Dashboard). The views are built on the first /admin
+# request rather than at import.
+def _build_admin():
+    from app.admin import setup_admin
+
+    # setup_admin mounts onto the app it's given; only the admin app itself is needed here
+    return setup_admin(Starlette(), engine).admin
+
+app.mount("/admin", LazyASGIApp(_build_admin), name="admin")
 
 # --- Authentication Router ---
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -101,8 +155,9 @@ def create_admin_user(
 async def login_for_access_token(
     form_data: auth.OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = auth.get_user(db, form_data.username) # form_data.username is the email
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    # form_data.username is usually the email
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -118,6 +173,8 @@ async def login_for_access_token(
 app.include_router(auth_router)
 # INCLUDE THE UPLOADS ROUTER
 app.include_router(uploads.router)
+app.include_router(exports.router)
+app.include_router(analytics.router)
 
 
 # ---------- Health Check ----------
@@ -125,17 +182,151 @@ app.include_router(uploads.router)
 def health_check():
     return {"status": "ok", "timestamp": datetime.utcnow()}
 
+@app.get("/health/db")
+def database_pool_health():
+    """
+    Live connection pool stats for this worker: connections checked out and
+    in overflow, checkout wait times and the background health check.
+    """
+    return pool_stats()
+
+@app.get("/health/snapshot")
+def intent_snapshot_health():
+    """
+    The intent snapshot this worker answers from: data version, load time and
+    approximate memory, measured when it was loaded.
+    """
+    return knowledge_snapshot.stats()
+
+@app.get("/health/intents")
+def intent_health():
+    """
+    The intent circuit breaker's state, how many last-good answers this
+    worker holds for fallbacks, and its intent lookups in progress.
+    """
+    return {
+        "breaker": intent_breaker.status(),
+        "fallback_answers": len(last_good_answers),
+        "lookups_in_progress": intent_slots.in_use(),
+        "max_lookups": intent_slots.size,
+    }
+
+@app.get("/health/changes")
+def change_bus_health():
+    """
+    How this worker hears about writes made by other workers: bus mode,
+    events received and the type of the listener's last error.
+    """
+    return change_bus.status()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 # ---------- Root ----------
 @app.get("/")
 def read_root():
     return {"message": "College Chatbot API is running 🚀"}
 
 # ---------- Webhook ----------
+def answer_intent(intent_name: str, parameters: dict, query_text: str, session_id: str, deadline: float) -> str:
+    """
+    Runs the intent handler and queues the exchange for the log writer.
+    This is blocking database work, so the webhook runs it off the event loop.
+    It opens its own session because the webhook stops waiting at `deadline`
+    and leaves it to finish in the background; a late answer still refreshes
+    the caches but isn't logged, since the user got the fallback instead.
+    """
+    started = time.perf_counter()
+    handler = INTENT_HANDLERS.get(intent_name)
+    cache_key = intent_cache.key(intent_name, parameters)
+    generation = intent_cache.generation()
+    cached = intent_cache.get(cache_key) if handler else None
+    intent_label = intent_name if handler else "unknown"  # bounded label values
+    db = SessionLocal(read_only=True)
+    try:
+        if not handler:
+            response_text = unanswered("Sorry, I don’t know how to handle that yet.")
+        elif cached is not None:
+            response_text = cached
+        else:
+            try:
+                response_text = handler(parameters, db)
+            except Exception:
+                metrics.INTENT_ERRORS.labels(intent_label).inc()
+                raise
+        if handler:
+            metrics.count_cache("intent", cached is not None)
+
+        # Log to DB with college_id if available. The handler has usually
+        # resolved the college already, so this reuses its lookup.
+        college_id = None
+        if 'college' in parameters and parameters['college']:
+            college = get_college_by_name(db, parameters['college'])
+            if college:
+                college_id = college.id
+    finally:
+        db.close()
+
+    late = time.perf_counter() > deadline
+    if handler:
+        if cached is None:
+            intent_cache.put(cache_key, college_id, response_text, generation)
+            if not late:
+                intent_breaker.record_success()
+        last_good_answers.put(cache_key, college_id, response_text)
+    if late:
+        return response_text
+
+    answered = not isinstance(response_text, Unanswered)
+    elapsed = time.perf_counter() - started
+    # Written in batches by the log sink, off the request's latency path
+    log_sink.submit(dict(
+        college_id=college_id, # Use the found college_id
+        user_id=session_id,
+        query=query_text,
+        bot_response=response_text,
+        intent=intent_name,
+        answered=answered,
+        latency_ms=elapsed * 1000,
+        timestamp=datetime.now(timezone.utc),
+    ))
+    metrics.INTENT_LATENCY.labels(intent_label, str(cached is not None).lower()).observe(elapsed)
+    if not answered:
+        metrics.INTENT_UNANSWERED.labels(intent_label).inc()
+    return response_text
+
+def serve_fallback(intent_name: str, parameters: dict, query_text: str, session_id: str, reason: str,
+                   started: float) -> str:
+    """
+    The last answer this worker gave for the same question, for when a fresh
+    one can't be had in time (`reason` is timeout, db_error, circuit_open or
+    overloaded).
+    """
+    intent_label = intent_name if intent_name in INTENT_HANDLERS else "unknown"
+    entry = last_good_answers.get(intent_cache.key(intent_name, parameters))
+    metrics.INTENT_FALLBACKS.labels(intent_label, reason, "stale" if entry else "none").inc()
+    if entry is None:
+        college_id, response_text = None, unanswered("Sorry, I can’t look that up right now. Please try again in a minute.")
+    else:
+        _, college_id, response_text = entry
+    log_sink.submit(dict(
+        college_id=college_id,
+        user_id=session_id,
+        query=query_text,
+        bot_response=response_text,
+        intent=intent_name,
+        answered=entry is not None,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        timestamp=datetime.now(timezone.utc),
+    ))
+    return response_text
+
 @app.post("/webhook")
 async def webhook(
     req: Request,
     x_dialogflow_secret: str = Header(None),
-    db: Session = Depends(get_db),
 ):
     # --- Webhook Security Check ---
     if not DIALOGFLOW_SECRET or x_dialogflow_secret != DIALOGFLOW_SECRET:
@@ -147,40 +338,66 @@ async def webhook(
         intent_name = body["queryResult"]["intent"]["displayName"]
         parameters = body["queryResult"]["parameters"]
         query_text = body["queryResult"]["queryText"]
+        session_id = body.get("session", "unknown")
 
         logger.info(f"Webhook called: intent={intent_name}, params={parameters}")
 
-        handler = INTENT_HANDLERS.get(intent_name)
-        if not handler:
-            response_text = "Sorry, I don’t know how to handle that yet."
+        # --- Deadline Budget ---
+        # Answer within the intent's budget or fall back to the last good
+        # answer, so Dialogflow never times out waiting on the database.
+        started = time.perf_counter()
+        budget = intent_budget(intent_name)
+        slot = None
+        if not intent_breaker.allow():
+            response_text = serve_fallback(intent_name, parameters, query_text, session_id, "circuit_open", started)
+        elif (slot := intent_slots.try_acquire()) is None:
+            logger.warning(f"{intent_slots.size} intent lookups already running; serving the fallback")
+            response_text = serve_fallback(intent_name, parameters, query_text, session_id, "overloaded", started)
         else:
-            response_text = handler(parameters, db)
-
-        # Log to DB with college_id if available
-        college_id = None
-        if 'college' in parameters and parameters['college']:
-            # Attempt to find the college mentioned in the query
-            college = db.query(models.College).filter(models.College.name.ilike(f"%{parameters['college']}%")).first()
-            if college:
-                college_id = college.id
-        
-        new_log = models.Log(
-            college_id=college_id, # Use the found college_id
-            user_id=body.get("session", "unknown"),
-            query=query_text,
-            bot_response=response_text,
-            timestamp=datetime.utcnow().isoformat()
-        )
-        db.add(new_log)
-        db.commit()
+            try:
+                with anyio.fail_after(budget):
+                    response_text = await run_in_db_thread(
+                        slot.run, answer_intent, intent_name, parameters, query_text, session_id, started + budget,
+                        abandon_on_cancel=True,
+                    )
+            except TimeoutError:
+                logger.warning(f"Intent {intent_name} took longer than {budget}s; serving the fallback")
+                intent_breaker.record_failure()
+                metrics.INTENT_TIMEOUTS.labels(intent_name if intent_name in INTENT_HANDLERS else "unknown").inc()
+                response_text = serve_fallback(intent_name, parameters, query_text, session_id, "timeout", started)
+            except SQLAlchemyError as e:
+                logger.error(f"Database error answering {intent_name}: {e}")
+                intent_breaker.record_failure()
+                response_text = serve_fallback(intent_name, parameters, query_text, session_id, "db_error", started)
+            finally:
+                # Frees the slot now if the lookup never started; a running
+                # (possibly abandoned) lookup frees it when it finishes.
+                slot.abandon()
 
         response = {"fulfillmentText": response_text}
-        return JSONResponse(content=response, media_type="application/json; charset=utf-8")
+        return JSONResponse(content=response, media_type="application/json; charset=utf-8")
 
     except Exception as e:
         logger.error(f"Webhook error: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+# ---------- Pagination ----------
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def paginate(query, model, response: Response, limit: int, after_id: int | None):
+    """
+    Keyset pagination: returns up to `limit` rows with id > `after_id`, in id
+    order. When a full page is returned, the `X-Next-Cursor` header holds the
+    `after_id` to pass for the next page.
+    """
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    rows = query.order_by(model.id).limit(limit).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
 # ---------- Protected Route Example ----------
 @app.get("/users/me/", response_model=schemas.UserOut)
 async def read_users_me(
@@ -214,11 +431,14 @@ def create_college(
 
 @app.get("/colleges/", response_model=list[schemas.CollegeOut])
 def get_colleges(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     try:
-        return db.query(models.College).all()
+        return paginate(db.query(models.College), models.College, response, limit, after_id)
     except Exception as e:
         logger.error(f"Error fetching colleges: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch colleges")
@@ -233,7 +453,7 @@ def create_faq(
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can create FAQs.")
     
-    college = db.query(models.College).filter(models.College.id == faq.college_id).first()
+    college = db.get(models.College, faq.college_id)
     if not college:
         raise HTTPException(status_code=404, detail="College not found")
     try:
@@ -249,11 +469,18 @@ def create_faq(
 
 @app.get("/faqs/", response_model=list[schemas.FAQOut])
 def get_faqs(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    college_id: int | None = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     try:
-        return db.query(models.FAQ).all()
+        query = db.query(models.FAQ)
+        if college_id is not None:
+            query = query.filter(models.FAQ.college_id == college_id)
+        return paginate(query, models.FAQ, response, limit, after_id)
     except Exception as e:
         logger.error(f"Error fetching FAQs: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch FAQs")
@@ -280,11 +507,18 @@ def create_fee(
 
 @app.get("/fees/", response_model=list[schemas.FeeOut])
 def get_fees(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    college_id: int | None = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     try:
-        return db.query(models.Fee).all()
+        query = db.query(models.Fee)
+        if college_id is not None:
+            query = query.filter(models.Fee.college_id == college_id)
+        return paginate(query, models.Fee, response, limit, after_id)
     except Exception as e:
         logger.error(f"Error fetching fees: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch fees")
@@ -311,11 +545,18 @@ def create_holiday(
 
 @app.get("/holidays/", response_model=list[schemas.HolidayOut])
 def get_holidays(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    college_id: int | None = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     try:
-        return db.query(models.Holiday).all()
+        query = db.query(models.Holiday)
+        if college_id is not None:
+            query = query.filter(models.Holiday.college_id == college_id)
+        return paginate(query, models.Holiday, response, limit, after_id)
     except Exception as e:
         logger.error(f"Error fetching holidays: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch holidays")
@@ -323,13 +564,20 @@ def get_holidays(
 # ---------- Logs ----------
 @app.get("/logs/", response_model=list[schemas.LogOut])
 def get_logs(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    college_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view logs.")
     try:
-        return db.query(models.Log).all()
+        query = filter_logs(db.query(models.Log), college_id, since, until)
+        return paginate(query, models.Log, response, limit, after_id)
     except Exception as e:
         logger.error(f"Error fetching logs: {e}")
         raise HTTPException(status_code=500, detail="Could not fetch logs")
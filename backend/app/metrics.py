@@ -0,0 +1,107 @@
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+# every worker write its samples to shared files that /metrics aggregates.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request",
+    ["method", "route"], buckets=QUERY_COUNT_BUCKETS,
+)
+INTENT_LATENCY = Histogram(
+    "webhook_intent_duration_seconds", "Time to answer a Dialogflow intent",
+    ["intent", "cached"], buckets=LATENCY_BUCKETS,
+)
+INTENT_ERRORS = Counter("webhook_intent_errors_total", "Intent handlers that raised", ["intent"])
+INTENT_UNANSWERED = Counter("webhook_unanswered_total", "Responses that had no answer for the user", ["intent"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+INTENT_TIMEOUTS = Counter("webhook_intent_timeouts_total", "Intent handlers abandoned after their time budget", ["intent"])
+INTENT_FALLBACKS = Counter(
+    "webhook_intent_fallbacks_total",
+    "Answers given without a fresh lookup, by reason (timeout/db_error/circuit_open/overloaded) and result (stale/none)",
+    ["intent", "reason", "result"],
+)
+INTENT_BREAKER_OPEN = Gauge(
+    "webhook_intent_breaker_open", "Workers whose intent circuit breaker is open or half-open",
+    multiprocess_mode="livesum",
+)
+
+# Mutable per-request query counter; a list so the DB threads the request
+# hands work to (which run in a copy of its context) add to the same count.
+_query_count: ContextVar[list | None] = ContextVar("query_count", default=None)
+
+
+def count_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(*args):
+        counter = _query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware timing every HTTP request by its route template
+    (e.g. /upload/{entity}/) and counting the SQL statements it ran.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        root_path = scope.get("root_path", "")
+        counter = [0]
+        token = _query_count.set(counter)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _query_count.reset(token)
+            # FastAPI puts the matched route in the scope. Inside a mounted
+            # app such as /admin that is the inner route, so it is prefixed
+            # with the mount path (what routing added to root_path).
+            mount = scope.get("root_path", "")[len(root_path):]
+            route = mount + (getattr(scope.get("route"), "path", None) or "") or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route, str(status_code[0])).observe(time.perf_counter() - started)
+            REQUEST_QUERIES.labels(method, route).observe(counter[0])
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Returns the exposition text for /metrics and its content type.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,8 +1,91 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, Date, DateTime, ForeignKey, Index, UniqueConstraint, DDL, event, inspect, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, timezone  # Import timezone here
 
+
+# ---------- Search Columns ----------
+# Text that intents match with '%term%' is also stored normalized in a shadow
+# column, so queries don't have to lower()/replace() every row. The shadow
+# columns are indexed with pg_trgm GIN on Postgres and with an FTS5 trigram
+# table on SQLite; both can serve infix LIKE matches.
+SEARCH_COLUMNS = []  # (model, source column, search column)
+
+
+def normalize_name(value: str | None) -> str | None:
+    """
+    Lowercases a name and removes spaces and periods, e.g. 'B. Tech' -> 'btech'.
+    """
+    if value is None:
+        return None
+    return value.lower().replace('.', '').replace(' ', '')
+
+
+def fts_table_name(table: str, column: str) -> str:
+    return f"{table}_{column}_fts"
+
+
+def _sqlite_fts_ddl(table: str, column: str) -> list[str]:
+    fts = fts_table_name(table, column)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+
+
+def _trigram_index(table: str, column: str) -> Index:
+    return Index(
+        f"ix_{table}_{column}_trgm",
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
+
+def searchable(source: str, search: str):
+    """
+    Class decorator that keeps `search` set to the normalized value of
+    `source` on every ORM insert and update.
+    """
+    def decorator(model):
+        def _fill(mapper, connection, target):
+            setattr(target, search, normalize_name(getattr(target, source)))
+
+        event.listen(model, "before_insert", _fill)
+        event.listen(model, "before_update", _fill)
+        for statement in _sqlite_fts_ddl(model.__tablename__, search):
+            event.listen(model.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+        SEARCH_COLUMNS.append((model, source, search))
+        return model
+    return decorator
+
+
+def content_hashed(model):
+    """
+    Class decorator for models that CSV imports can upsert. `row_hash` holds
+    the hash of the row as last imported; any other ORM update clears it, so
+    the next import can't mistake an edited row for an unchanged one.
+    """
+    def _clear(mapper, connection, target):
+        if not inspect(target).attrs.row_hash.history.has_changes():
+            target.row_hash = None
+
+    event.listen(model, "before_update", _clear)
+    return model
+
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 # ---------- User ----------
 class User(Base):
     __tablename__ = "users"
@@ -59,8 +142,11 @@ class Department(Base):
         return self.dept_name
 
 # ---------- FAQs ----------
+@content_hashed
 class FAQ(Base):
     __tablename__ = "faqs"
+    # Keyset pagination of a college's rows: WHERE college_id = ? AND id > ? ORDER BY id
+    __table_args__ = (Index("ix_faqs_college_id_id", "college_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
@@ -69,6 +155,7 @@ class FAQ(Base):
     question = Column(String, index=True)
     answer = Column(String)
     language = Column(String, default="en")
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="faqs")
     department = relationship("Department", back_populates="faqs")
@@ -79,16 +166,24 @@ class FAQ(Base):
 
 
 # ---------- Fees ----------
+@content_hashed
+@searchable("program", "program_search")
 class Fee(Base):
     __tablename__ = "fees"
+    __table_args__ = (
+        _trigram_index("fees", "program_search"),
+        Index("ix_fees_college_id_id", "college_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
     dept_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
     program = Column(String, index=True)
+    program_search = Column(String)
     year = Column(Integer, index=True)
     amount = Column(Float)
     deadline = Column(Date)
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="fees")
     department = relationship("Department", back_populates="fees")
@@ -99,8 +194,10 @@ class Fee(Base):
 
 
 # ---------- Holidays ----------
+@content_hashed
 class Holiday(Base):
     __tablename__ = "holidays"
+    __table_args__ = (Index("ix_holidays_college_id_id", "college_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
@@ -108,6 +205,7 @@ class Holiday(Base):
     holiday_name = Column(String)
     start_date = Column(Date)
     end_date = Column(Date)
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="holidays")
     department = relationship("Department", back_populates="holidays")
@@ -118,16 +216,21 @@ class Holiday(Base):
 
 
 # ---------- Admissions ----------
+@content_hashed
+@searchable("course", "course_search")
 class Admission(Base):
     __tablename__ = "admissions"
+    __table_args__ = (_trigram_index("admissions", "course_search"),)
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
     dept_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
     course = Column(String, index=True)
+    course_search = Column(String)
     eligibility = Column(String)
     process = Column(String)
     last_date = Column(Date)
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="admissions")
     department = relationship("Department", back_populates="admissions")
@@ -138,15 +241,20 @@ class Admission(Base):
 
 
 # ---------- Scholarships ----------
+@content_hashed
+@searchable("eligibility", "eligibility_search")
 class Scholarship(Base):
     __tablename__ = "scholarships"
+    __table_args__ = (_trigram_index("scholarships", "eligibility_search"),)
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
     name = Column(String, index=True)
     eligibility = Column(String)
+    eligibility_search = Column(String)
     amount = Column(Float)
     deadline = Column(Date)
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="scholarships")
 
@@ -156,16 +264,21 @@ class Scholarship(Base):
 
 
 # ---------- Timetables ----------
+@content_hashed
+@searchable("course", "course_search")
 class Timetable(Base):
     __tablename__ = "timetables"
+    __table_args__ = (_trigram_index("timetables", "course_search"),)
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"))
     dept_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
     course = Column(String, index=True)
+    course_search = Column(String)
     year = Column(Integer, index=True)
     semester = Column(Integer, index=True)
     timetable_url = Column(String)  # link to PDF/image
+    row_hash = Column(String(32), nullable=True)  # set by CSV imports
 
     college = relationship("College", back_populates="timetables")
     department = relationship("Department", back_populates="timetables")
@@ -178,12 +291,213 @@ class Timetable(Base):
 # ---------- Logs ----------
 class Log(Base):
     __tablename__ = "logs"
+    __table_args__ = (
+        Index("ix_logs_college_id_id", "college_id", "id"),
+        Index("ix_logs_college_id_timestamp", "college_id", "timestamp"),
+        Index("ix_logs_timestamp", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     college_id = Column(Integer, ForeignKey("colleges.id"), nullable=True)
     user_id = Column(String)
     query = Column(String)
     bot_response = Column(String)
-    timestamp = Column(String)
+    intent = Column(String, nullable=True)
+    answered = Column(Boolean, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     college = relationship("College", back_populates="logs")
+
+
+# ---------- Log Rollups ----------
+class LogRollup(Base):
+    """
+    Hourly webhook traffic per college and intent, kept up to date as logs
+    are written. `college_id` is 0 for queries that didn't name a known
+    college and `intent` is '' when Dialogflow sent none, so every bucket has
+    a non-null key the upsert can conflict on.
+    """
+    __tablename__ = "log_rollups"
+    __table_args__ = (
+        UniqueConstraint("college_id", "intent", "hour", name="uq_log_rollups_bucket"),
+        Index("ix_log_rollups_hour", "hour"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    college_id = Column(Integer, nullable=False, default=0)
+    intent = Column(String, nullable=False, default="")
+    hour = Column(DateTime(timezone=True), nullable=False)
+    queries = Column(Integer, nullable=False, default=0)
+    unanswered = Column(Integer, nullable=False, default=0)
+    latency_ms_total = Column(Float, nullable=False, default=0)
+    latency_ms_max = Column(Float, nullable=False, default=0)
+
+
+# ---------- Import Jobs ----------
+class ImportJob(Base):
+    """
+    A background CSV import. Progress is stored here rather than in memory so
+    any worker can answer a status poll.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    entity = Column(String, nullable=False)
+    college_id = Column(Integer, ForeignKey("colleges.id"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    rows_processed = Column(Integer, nullable=False, default=0)
+    mode = Column(String, nullable=False, default="insert")  # insert, upsert, sync
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    unchanged = Column(Integer, nullable=False, default=0)
+    deleted = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)
+    message = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.started_at is None:
+            return None
+        started = self.started_at.replace(tzinfo=self.started_at.tzinfo or timezone.utc)
+        finished = self.finished_at or datetime.now(timezone.utc)
+        finished = finished.replace(tzinfo=finished.tzinfo or timezone.utc)
+        elapsed = (finished - started).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else None
+
+    def __str__(self):
+        return f"{self.entity} import {self.id} ({self.status})"
+
+
+# ---------- Data Version ----------
+class DataVersion(Base):
+    """
+    Single-row counter bumped by every commit that changes intent data, so
+    workers serving from an in-memory snapshot can tell cheaply when to reload.
+    """
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# ---------- Change Events ----------
+class ChangeEvent(Base):
+    """
+    Committed changes broadcast to the other workers when the database has no
+    LISTEN/NOTIFY (SQLite). Workers poll for ids above the last one they saw;
+    rows older than CHANGE_EVENT_RETENTION are pruned.
+    """
+    __tablename__ = "change_events"
+    # Never reuse ids after pruning; pollers only look above the last id they saw.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    origin = Column(String, nullable=False)
+    payload = Column(String, nullable=False)  # JSON list of [table, college_id, row_id, op]
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+
+# ---------- Schema Sync ----------
+def sync_search_columns(engine):
+    """
+    Adds and backfills search columns (and their indexes) on databases created
+    before they existed. `create_all` only handles brand-new tables.
+    """
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for model, source, search in SEARCH_COLUMNS:
+            table = model.__tablename__
+            if search in {c["name"] for c in existing.get_columns(table)}:
+                continue
+
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {search} VARCHAR"))
+            conn.execute(text(
+                f"UPDATE {table} SET {search} = lower(replace(replace({source}, '.', ''), ' ', ''))"
+            ))
+            for index in model.__table__.indexes:
+                if search in index.columns:
+                    index.create(conn, checkfirst=True)
+            if conn.dialect.name == "sqlite":
+                for statement in _sqlite_fts_ddl(table, search):
+                    conn.execute(text(statement))
+                fts = fts_table_name(table, search)
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def sync_columns(engine):
+    """
+    Adds plain columns that were added to the models after their tables
+    existed. Search columns are handled by `sync_search_columns`.
+    """
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not existing.has_table(table.name):
+                continue
+            present = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    column_type = column.type.compile(dialect=conn.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+# SQLite user_version from which logs.timestamp holds no isoformat strings
+SQLITE_LOG_TIMESTAMPS_VERSION = 1
+
+
+def sync_log_timestamps(engine):
+    """
+    Converts `logs.timestamp` from the isoformat strings it used to hold to a
+    real timestamp column.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            column = next(c for c in inspect(conn).get_columns("logs") if c["name"] == "timestamp")
+            if not isinstance(column["type"], DateTime):
+                conn.execute(text(
+                    "ALTER TABLE logs ALTER COLUMN timestamp TYPE TIMESTAMP WITH TIME ZONE "
+                    "USING (timestamp::timestamp AT TIME ZONE 'UTC')"
+                ))
+        elif conn.dialect.name == "sqlite":
+            # SQLite keeps whatever was stored; rewrite 'YYYY-MM-DDTHH:MM:SS' into
+            # the 'YYYY-MM-DD HH:MM:SS' form SQLAlchemy reads and compares.
+            # That scans the whole table, so it runs once per database and
+            # is then recorded in the file's user_version.
+            if conn.execute(text("PRAGMA user_version")).scalar() < SQLITE_LOG_TIMESTAMPS_VERSION:
+                conn.execute(text("UPDATE logs SET timestamp = replace(timestamp, 'T', ' ') WHERE timestamp LIKE '%T%'"))
+                conn.execute(text(f"PRAGMA user_version = {SQLITE_LOG_TIMESTAMPS_VERSION}"))
+
+
+def sync_indexes(engine):
+    """
+    Creates indexes that were added to the models after their tables existed.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def sync_data_version(engine):
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM data_version WHERE id = 1")).first() is None:
+            conn.execute(text("INSERT INTO data_version (id, version) VALUES (1, 0)"))
+
+
+def sync_schema(engine):
+    """
+    Brings an existing database up to date with the models. Safe to run on
+    every start; each step only does work when something is missing.
+    """
+    sync_search_columns(engine)
+    sync_columns(engine)
+    sync_log_timestamps(engine)
+    sync_indexes(engine)
+    sync_data_version(engine)
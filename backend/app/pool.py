@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the checkout latency histogram buckets; the last bucket is open-ended.
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout takes (waiting for a free
+    connection, opening a new one and any pre-ping). A pool recreated by
+    `engine.dispose()` starts with fresh counters.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            self._record_checkout(time.perf_counter() - started)
+
+    def _record_checkout(self, seconds: float):
+        ms = seconds * 1000
+        with self._stats_lock:
+            self._checkouts += 1
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, ms)
+            self._buckets[bisect_left(CHECKOUT_BUCKETS_MS, ms)] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            buckets = list(self._buckets)
+            checkouts, timeouts = self._checkouts, self._timeouts
+            wait_total, wait_max = self._wait_total, self._wait_max
+        bounds = [f"le_{bound}ms" for bound in CHECKOUT_BUCKETS_MS] + ["inf"]
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_seconds_total": round(wait_total, 6),
+            "wait_ms_avg": round(wait_total * 1000 / checkouts, 3) if checkouts else 0.0,
+            "wait_ms_max": round(wait_max, 3),
+            "checkout_latency_ms": dict(zip(bounds, buckets)),
+        }
+
+
+class PoolHealthCheck:
+    """
+    Background replacement for `pool_pre_ping`: every `interval` seconds it
+    runs SELECT 1 on a pooled connection. If the database has dropped its
+    connections, the resulting disconnect error makes SQLAlchemy invalidate
+    the whole pool, so requests get fresh connections without a ping per
+    checkout.
+    """
+
+    def __init__(self, engine, interval: float):
+        self.engine = engine
+        self.interval = interval
+        self.last_check = None
+        self.last_ok = None
+        self.last_error = None
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.last_ok = time.time()
+            self.last_error = None
+        except Exception as e:
+            self.failures += 1
+            # Only the type is shown on /health/db, which needs no auth; the
+            # message can name hosts and databases and goes to the log.
+            self.last_error = type(e).__name__
+            logger.warning(f"Database health check failed: {e}")
+        finally:
+            self.last_check = time.time()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-health-check", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5)
+        self._thread = None
+
+    def status(self) -> dict:
+        return {
+            "running": self._thread is not None,
+            "interval_seconds": self.interval,
+            "last_check": self.last_check,
+            "last_ok": self.last_ok,
+            "last_error": self.last_error,
+            "failures": self.failures,
+        }
@@ -0,0 +1,126 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Opt-in: with SQL_PROFILE=1 every HTTP request logs a summary of its SQL.
+SQL_PROFILE = os.getenv("SQL_PROFILE", "0").lower() in ("1", "true", "yes")
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", 100))
+# An identical statement run this many times in one request is flagged as N+1.
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", 3))
+
+_current: ContextVar["QueryProfile | None"] = ContextVar("sql_profile", default=None)
+
+
+class QueryProfile:
+    """
+    The statements run while a profile is active, with their durations.
+    Statements are compared by SQL text, so the same query with different
+    parameters counts as a repeat.
+    """
+
+    def __init__(self):
+        self.statements = []  # (sql, duration in ms)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms in self.statements)
+
+    def repeated(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        counts = Counter(sql for sql, _ in self.statements)
+        return [(sql, n) for sql, n in counts.most_common() if n >= threshold]
+
+    def slow(self, slow_ms: float = SQL_PROFILE_SLOW_MS) -> list[tuple[str, float]]:
+        return [(sql, ms) for sql, ms in self.statements if ms >= slow_ms]
+
+    def summary(self) -> str:
+        lines = [f"{self.count} queries in {self.total_ms:.1f} ms"]
+        for sql, n in self.repeated():
+            lines.append(f"  possible N+1: {n}x {_short(sql)}")
+        for sql, ms in self.slow():
+            lines.append(f"  slow: {ms:.1f} ms {_short(sql)}")
+        return "\n".join(lines)
+
+
+def _short(sql: str, length: int = 200) -> str:
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= length else sql[:length] + "..."
+
+
+def instrument_engine(engine):
+    """
+    Records every statement `engine` runs into the active profile, if any.
+    Costs one context variable lookup per statement when nothing is profiled.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        started = conn.info.get("profile_started")
+        if profile is not None and started:
+            profile.statements.append((statement, (time.perf_counter() - started.pop()) * 1000))
+
+
+@contextmanager
+def profile_queries():
+    """
+    Profiles the SQL run inside the block, including work handed to DB
+    threads from it. Yields the QueryProfile.
+    """
+    profile = QueryProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Test helper that fails if the block runs more than `max_queries` SQL
+    statements, e.g. in a pytest test:
+
+        with assert_max_queries(2):
+            response = client.get("/fees/", headers=auth_headers)
+    """
+    with profile_queries() as profile:
+        yield profile
+    if profile.count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {profile.summary()}")
+
+
+class SQLProfileMiddleware:
+    """
+    Plain ASGI middleware that profiles each HTTP request's SQL and logs a
+    summary, as a warning when it found repeats or slow statements.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+            await self.app(scope, receive, send)
+
+        level = logging.WARNING if profile.repeated() or profile.slow() else logging.INFO
+        logger.log(level, f"SQL profile {scope['method']} {scope['path']}: {profile.summary()}")
@@ -0,0 +1,170 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, loading
+
+from app import changes, metrics, models
+
+# --- Configuration ---
+# Set REFERENCE_CACHE_SIZE=0 to turn the cache off.
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", 4096))
+# Backstop for writes that bypass the ORM and the change bus (raw SQL).
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", 600))
+
+# Models read on nearly every request and written a few times a term, with
+# the natural keys `get_by` accepts for each.
+NATURAL_KEYS = {
+    models.College: {("name",), ("domain",)},
+    models.Department: {("college_id", "dept_name")},
+    models.User: {("username",), ("email",)},
+}
+REFERENCE_TABLES = {model.__tablename__ for model in NATURAL_KEYS}
+
+
+class ReferenceCache:
+    """
+    Per-worker LRU + TTL cache of reference rows. Primary key loads are kept
+    as frozen ORM results, natural keys as the primary key they resolve to.
+    A committed change to a table evicts the changed rows and all of that
+    table's natural keys.
+    """
+
+    def __init__(self, max_size=REFERENCE_CACHE_SIZE, ttl=REFERENCE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # ("pk", table, identity) -> (expires_at, FrozenResult)
+        # ("natural", table, fields, values) -> (expires_at, primary key)
+        self._entries = OrderedDict()
+        self._generations = dict.fromkeys(REFERENCE_TABLES, 0)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def generation(self, table: str) -> int:
+        return self._generations[table]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation: int):
+        with self._lock:
+            if generation != self._generations[key[1]]:
+                return  # the table changed while this row was loaded
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, table: str, row_id=None):
+        """
+        Drops `row_id` (every row when None) and the table's natural keys.
+        """
+        with self._lock:
+            self._generations[table] += 1
+            for key in [k for k in self._entries if k[1] == table]:
+                if key[0] == "natural" or row_id is None or key[2] == (row_id,):
+                    del self._entries[key]
+
+    def clear(self):
+        for table in REFERENCE_TABLES:
+            self.evict(table)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+reference_cache = ReferenceCache()
+
+
+def get_by(db: Session, model, **values):
+    """
+    Reference row by natural key, e.g. `get_by(db, models.College, name=...)`,
+    or None. Repeat lookups cost no queries: the key resolves to a primary
+    key and `db.get` is served from the cache.
+    """
+    fields = tuple(sorted(values))
+    if fields not in NATURAL_KEYS.get(model, ()):
+        raise ValueError(f"{fields} is not a natural key of {model.__name__}")
+    table = model.__tablename__
+    key = ("natural", table, fields, tuple(values[field] for field in fields))
+    if reference_cache.enabled:
+        row_id = reference_cache.get(key)
+        if row_id is not None:
+            return db.get(model, row_id)
+    generation = reference_cache.generation(table)
+    obj = db.query(model).filter_by(**values).first()
+    if obj is not None and reference_cache.enabled:
+        reference_cache.put(key, obj.id, generation)
+    return obj
+
+
+def _identity_key(state):
+    """
+    ("pk", table, identity) when the statement is a plain primary key load of
+    a reference model (`db.get` or a many-to-one lazy load), else None.
+    """
+    if not state.is_select or state.is_from_statement:
+        return None
+    statement = state.statement
+    mapper = statement._propagate_attrs.get("plugin_subject")
+    if mapper is None or getattr(mapper, "class_", None) not in NATURAL_KEYS:
+        return None
+    options = state.load_options
+    if options._refresh_state is not None or options._populate_existing:
+        return None
+    if statement._with_options or statement._for_update_arg is not None:
+        return None
+    get_clause, get_params = mapper._get_clause
+    if len(statement._where_criteria) != 1 or statement._where_criteria[0] is not get_clause:
+        return None
+    identity = tuple(state.parameters[get_params[column].key] for column in mapper.primary_key)
+    return ("pk", mapper.local_table.name, identity)
+
+
+# ---------- Session Hooks ----------
+@event.listens_for(Session, "do_orm_execute")
+def _serve_reference_rows(state):
+    if not reference_cache.enabled:
+        return None
+    key = _identity_key(state)
+    if key is None:
+        return None
+    cached = reference_cache.get(key)
+    metrics.count_cache("reference", cached is not None)
+    if cached is not None:
+        return loading.merge_frozen_result(state.session, state.statement, cached, load=False)()
+    generation = reference_cache.generation(key[1])
+    frozen = state.invoke_statement().freeze()
+    # Cache a detached copy, so later changes to the loading session's
+    # objects (committed or not) never leak into other sessions.
+    reference_cache.put(key, pickle.loads(pickle.dumps(frozen)), generation)
+    return frozen()
+
+
+@changes.subscribe
+def _evict_reference_rows(committed):
+    for change in committed:
+        if change.table in REFERENCE_TABLES:
+            reference_cache.evict(change.table, change.row_id)
@@ -0,0 +1,237 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app import changes
+from app.pool import InstrumentedQueuePool, PoolHealthCheck
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Seconds between SELECT 1 checks on each replica; 0 relies on failed
+# connections alone to take a replica out of rotation.
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))
+# How long a replica that failed to connect is skipped.
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", 30))
+# Longest replication lag we expect. After a write, the writer's reads (by
+# cookie) and every worker's cache reloads (by the change bus) use the
+# primary for this long.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_COOKIE = "db_primary_until"
+
+# Per-request routing state set by ReadYourWritesMiddleware:
+# {"primary": bool, "wrote": bool}. Shared with the request's worker threads.
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+class ReplicaSet:
+    """
+    Read replica engines handed out round-robin, skipping any that failed
+    their last health check or a recent connection attempt.
+    """
+
+    def __init__(self, engines, check_interval=REPLICA_CHECK_INTERVAL, retry_seconds=REPLICA_RETRY_SECONDS):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._checks = [PoolHealthCheck(engine, check_interval) for engine in self.engines]
+        self._down_until = [0.0] * len(self.engines)
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        self._primary_until = 0.0
+        self.failovers = 0
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+        if self.engines:
+            changes.subscribe(self._on_changes)
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def _on_error(self, context):
+        # Connection failures (no connection yet) and dropped connections;
+        # ordinary SQL errors don't say anything about the replica's health.
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+    def _on_changes(self, committed):
+        # This worker's own commits (which also flag the request, for the
+        # cookie) and, through the change bus, other workers'.
+        if not any(change.table not in changes.LOCAL_TABLES for change in committed):
+            return
+        self.hold_primary()
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+
+    def mark_down(self, engine):
+        index = self.engines.index(engine)
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+        logger.warning(f"Read replica {engine.url.render_as_string(hide_password=True)} is down; "
+                       f"skipping it for {self.retry_seconds:.0f}s")
+
+    def healthy(self, index: int) -> bool:
+        return self._down_until[index] < time.monotonic() and self._checks[index].last_error is None
+
+    def is_down(self, engine) -> bool:
+        return not self.healthy(self.engines.index(engine))
+
+    def choose(self):
+        """
+        The next healthy replica, or None when all of them are down.
+        """
+        with self._lock:
+            start = next(self._turn)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self.healthy(index):
+                return self.engines[index]
+        self.failovers += 1
+        return None
+
+    def hold_primary(self):
+        """
+        Sends this worker's reads to the primary for REPLICA_STICKY_SECONDS.
+        """
+        self._primary_until = time.monotonic() + REPLICA_STICKY_SECONDS
+
+    def holding_primary(self) -> bool:
+        return self._primary_until > time.monotonic()
+
+    def start(self):
+        for check in self._checks:
+            check.start()
+
+    def stop(self):
+        for check in self._checks:
+            check.stop()
+
+    def stats(self) -> list[dict]:
+        stats = []
+        for index, engine in enumerate(self.engines):
+            pool = engine.pool
+            stats.append({
+                # By position in DATABASE_REPLICA_URLS: /health/db needs no
+                # auth, and the URL names the host and database.
+                "replica": index,
+                "healthy": self.healthy(index),
+                "pool": pool.stats() if isinstance(pool, InstrumentedQueuePool) else {"status": pool.status()},
+                "health_check": self._checks[index].status(),
+            })
+        return stats
+
+
+def _prefers_primary() -> bool:
+    state = _request_state.get()
+    return state is not None and (state["primary"] or state["wrote"])
+
+
+class RoutingSession(Session):
+    """
+    Session that sends a read-only session's SELECTs to a replica. Writes,
+    flushes, sessions that have flushed, and requests that need to read their
+    own writes use the primary (the session's `bind`). A statement that finds
+    its replica gone is retried once on the next healthy replica or the
+    primary.
+    """
+
+    def __init__(self, *args, replicas: ReplicaSet | None = None, read_only: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.read_only = read_only
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.read_only
+            and self.replicas
+            and not self._flushing
+            and not self.info.get("flushed")
+            and not isinstance(clause, (Insert, Update, Delete))
+            and not _prefers_primary()
+            and not self.replicas.holding_primary()
+        ):
+            if self._replica is None:
+                self._replica = self.replicas.choose()
+            if self._replica is not None:
+                return self._replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _execute_internal(self, *args, **kwargs):
+        # Every ORM statement (execute, scalar(s), get, lazy loads) passes
+        # through here.
+        replica = self._replica
+        try:
+            return super()._execute_internal(*args, **kwargs)
+        except DBAPIError:
+            # The engine's handle_error hook has already marked the replica
+            # down if this was a connection failure or a dropped connection.
+            if (
+                replica is None
+                or self._replica is not replica
+                or not self.replicas.is_down(replica)
+                or self.info.get("flushed")
+                or self.new or self.dirty or self.deleted
+            ):
+                raise
+            logger.warning("Read replica failed mid-session; retrying the statement elsewhere")
+            self._replica = None
+            self.rollback()  # drop the broken connection
+            return super()._execute_internal(*args, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flushed(session, flush_context):
+    session.info["flushed"] = True
+
+
+class ReadYourWritesMiddleware:
+    """
+    Plain ASGI middleware that keeps a client on the primary for
+    REPLICA_STICKY_SECONDS after one of its requests committed a data
+    change, using a short-lived cookie.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = {"primary": _cookie_active(scope), "wrote": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state["wrote"]:
+                until = time.time() + REPLICA_STICKY_SECONDS
+                cookie = (f"{REPLICA_COOKIE}={until:.0f}; Max-Age={max(1, round(REPLICA_STICKY_SECONDS))}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())])
+            await send(message)
+
+        token = _request_state.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_state.reset(token)
+
+
+def _cookie_active(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(REPLICA_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value) > time.time()
+                except ValueError:
+                    return False
+    return False
+
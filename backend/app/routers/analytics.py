@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+import logging
+
+from app import models, schemas, auth
+from app.database import get_read_db
+from app.filters import to_utc
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(auth.get_current_active_user)]
+)
+
+
+@router.get("/queries/", response_model=list[schemas.QueryStatsOut])
+def get_query_stats(
+    granularity: Literal["hour", "day"] = "day",
+    college_id: int | None = None,
+    intent: str | None = None,
+    by_intent: bool = False,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.UserOut = Depends(auth.get_current_active_user)
+):
+    """
+    Query counts, unanswered counts and latency per hour or day, read from the
+    hourly log rollups rather than the raw logs. Defaults to the last 7 days.
+    Pass `by_intent=true` to get one series per intent.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view analytics.")
+
+    until = to_utc(until) if until else datetime.now(timezone.utc)
+    since = to_utc(since) if since else until - timedelta(days=7)
+
+    try:
+        query = db.query(models.LogRollup).filter(
+            models.LogRollup.hour >= since.replace(minute=0, second=0, microsecond=0),
+            models.LogRollup.hour < until,
+        )
+        if college_id is not None:
+            query = query.filter(models.LogRollup.college_id == college_id)
+        if intent is not None:
+            query = query.filter(models.LogRollup.intent == intent)
+
+        # Hourly rollups are few enough (per college, per intent, per hour)
+        # to merge into days here instead of with dialect-specific SQL.
+        periods = {}
+        for row in query.yield_per(1000):
+            hour = to_utc(row.hour)
+            period = hour if granularity == "hour" else hour.replace(hour=0)
+            key = (period, row.intent if (by_intent or intent is not None) else None)
+            stats = periods.setdefault(key, {"queries": 0, "unanswered": 0, "latency_total": 0.0, "latency_max": 0.0})
+            stats["queries"] += row.queries
+            stats["unanswered"] += row.unanswered
+            stats["latency_total"] += row.latency_ms_total
+            stats["latency_max"] = max(stats["latency_max"], row.latency_ms_max)
+
+        return [
+            schemas.QueryStatsOut(
+                period=period,
+                college_id=college_id,
+                intent=intent_name,
+                queries=stats["queries"],
+                unanswered=stats["unanswered"],
+                avg_latency_ms=stats["latency_total"] / stats["queries"] if stats["queries"] else 0.0,
+                max_latency_ms=stats["latency_max"],
+            )
+            for (period, intent_name), stats in sorted(periods.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+        ]
+    except Exception as e:
+        logger.error(f"Error fetching query stats: {e}")
+        raise HTTPException(status_code=500, detail="Could not fetch query stats")
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from datetime import datetime
+from typing import Literal
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+
+from app import models, schemas, auth
+from app.database import SessionLocal
+from app.filters import filter_logs
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor (and serialized) per chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+LOG_EXPORT_COLUMNS = ["id", "college_id", "user_id", "query", "bot_response", "intent", "answered", "latency_ms", "timestamp"]
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Exports"],
+    dependencies=[Depends(auth.get_current_active_user)]
+)
+
+
+def _serialize_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps({c: _serialize_value(v) for c, v in zip(LOG_EXPORT_COLUMNS, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(LOG_EXPORT_COLUMNS)
+    writer.writerows([_serialize_value(v) for v in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _stream_logs(fmt: str, compress: bool, college_id, since, until):
+    """
+    Yields the export in chunks of EXPORT_BATCH_SIZE rows read through a
+    server-side cursor, so memory stays flat regardless of the row count.
+    Runs in Starlette's threadpool, since it's a plain generator.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    statement = filter_logs(
+        select(*(getattr(models.Log, c) for c in LOG_EXPORT_COLUMNS)), college_id, since, until
+    ).order_by(models.Log.id)
+
+    db = SessionLocal(read_only=True)
+    try:
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        first = True
+        for rows in result.partitions():
+            chunk = _encode_ndjson(rows) if fmt == "ndjson" else _encode_csv(rows, header=first)
+            first = False
+            yield compressor.compress(chunk) if compressor else chunk
+        if first and fmt == "csv":
+            chunk = _encode_csv([], header=True)
+            yield compressor.compress(chunk) if compressor else chunk
+        if compressor:
+            yield compressor.flush()
+    except Exception as e:
+        # Headers are already sent at this point; all we can do is log and cut the stream.
+        logger.error(f"Error exporting logs: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@router.get("/logs/")
+def export_logs(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    college_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    current_user: schemas.UserOut = Depends(auth.get_current_active_user)
+):
+    """
+    Streams conversation logs as NDJSON or CSV, optionally gzip-compressed,
+    filtered by college and a [since, until) time range.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can export logs.")
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"logs.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        _stream_logs(format, gzip, college_id, since, until),
+        media_type=media_type,
+        headers=headers,
+    )
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-import csv
-import io
+from typing import Literal
 import logging
 
 from app import models, schemas, auth
 from app.database import get_db
+from app.importers import IMPORT_SPECS, InvalidImportFile, import_csv
+from app.import_jobs import submit_import, ImportQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -17,63 +19,85 @@ router = APIRouter(
     dependencies=[Depends(auth.get_current_active_user)]
 )
 
-@router.post("/fees/")
-def upload_fees_csv(
+@router.post("/{entity}/")
+def upload_csv(
+    entity: str,
     # Use Form(...) to receive the college_id alongside the file
     college_id: int = Form(...),
     file: UploadFile = File(...),
+    mode: Literal["insert", "upsert", "sync"] = Form("insert"),
+    background: bool = Form(False),
     db: Session = Depends(get_db),
     # We still need current_user here to check their role
     current_user: schemas.UserOut = Depends(auth.get_current_active_user)
 ):
     """
-    Handles the bulk upload of fees from a CSV file.
-    The CSV must contain the headers: 'course_name', 'amount', 'deadline', 'category'.
+    Handles the bulk upload of one entity type from a CSV file.
+    `entity` is one of: fees, faqs, holidays, admissions, scholarships, timetables.
+    The CSV headers are the entity's fields (e.g. 'program', 'year', 'amount',
+    'deadline' for fees; 'course_name' is still accepted for 'program').
+
+    The file is streamed and inserted in batches; rows that fail validation
+    are skipped and reported with their line numbers.
+
+    `mode=upsert` matches rows on their natural key (e.g. program and year for
+    fees) and only writes new or changed ones; `mode=sync` also deletes the
+    college's rows that are missing from the file.
+
+    With `background=true` the file is queued as an import job instead and
+    the response (202) carries its id; poll `/upload/jobs/{job_id}` for progress.
     """
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can upload data.")
 
+    if entity not in IMPORT_SPECS:
+        raise HTTPException(status_code=404, detail=f"Unknown upload type '{entity}'. Expected one of: {list(IMPORT_SPECS)}")
+
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a CSV.")
 
-    try:
-        contents = file.file.read()
-        buffer = io.StringIO(contents.decode("utf-8"))
-        csv_reader = csv.DictReader(buffer)
-        
-        fees_to_create = []
-        errors = []
-        expected_headers = {"course_name", "amount", "deadline"}
-
-        if not csv_reader.fieldnames or not expected_headers.issubset(csv_reader.fieldnames):
-            raise HTTPException(status_code=400, detail=f"CSV headers are incorrect. Expected at least: {list(expected_headers)}")
-
-        for i, row in enumerate(csv_reader):
-            try:
-                fee_data = schemas.FeeCreate(
-                    college_id=college_id,
-                    course_name=row["course_name"],
-                    amount=float(row["amount"]),
-                    deadline=row["deadline"],
-                    category=row.get("category", "General")
-                )
-                fees_to_create.append(fee_data)
-            except Exception as e:
-                errors.append(f"Row {i+2}: {e}")
-
-        if errors:
-            raise HTTPException(status_code=400, detail={"message": "Validation errors found in CSV", "errors": errors})
-
-        for fee_data in fees_to_create:
-            new_fee = models.Fee(**fee_data.dict())
-            db.add(new_fee)
-        
-        db.commit()
-        return {"message": f"Successfully uploaded and created {len(fees_to_create)} fee records."}
+    if not db.get(models.College, college_id):
+        raise HTTPException(status_code=404, detail="College not found")
+
+    if background:
+        try:
+            job = submit_import(db, entity, college_id, file.file, current_user.id, mode)
+        except ImportQueueFull as e:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error queueing {entity} import: {e}")
+            raise HTTPException(status_code=500, detail="Could not queue the import")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": f"Import of {entity} queued.", "job_id": job.id, "status": job.status},
+        )
 
+    try:
+        result = import_csv(db, entity, college_id, file.file, mode=mode)
+    except InvalidImportFile as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The file is not valid UTF-8 text.")
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error processing fees CSV: {e}")
+        logger.error(f"Error processing {entity} CSV: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred while processing the file: {str(e)}")
 
-# You can add more upload endpoints here later, like upload_faqs_csv, etc.
\ No newline at end of file
+    return {"message": result.summary(), **result.as_dict()}
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.ImportJobOut)
+def get_import_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: schemas.UserOut = Depends(auth.get_current_active_user)
+):
+    """
+    Returns the status and progress of a background import job.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view imports.")
+
+    job = db.get(models.ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
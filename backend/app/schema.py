@@ -0,0 +1,28 @@
+"""
+Schema management as a one-off step, run once per deploy instead of by every
+worker at import:
+
+    python -m app.schema
+
+Creates missing tables, then adds the columns, indexes and conversions that
+newer models need (see `models.sync_schema`).
+"""
+import logging
+import time
+
+from app.database import Base, engine
+from app import models
+
+logger = logging.getLogger(__name__)
+
+
+def create_schema(bind=engine):
+    Base.metadata.create_all(bind=bind)
+    models.sync_schema(bind)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    started = time.perf_counter()
+    create_schema()
+    logger.info(f"Schema is up to date ({time.perf_counter() - started:.2f}s)")
@@ -176,7 +176,10 @@ class LogBase(BaseModel):
     user_id: str
     query: str
     bot_response: str
-    timestamp: str
+    timestamp: datetime
+    intent: str | None = None
+    answered: bool | None = None
+    latency_ms: float | None = None
 
 
 class LogCreate(LogBase):
@@ -189,3 +192,38 @@ class LogOut(LogBase):
 
     class Config:
         from_attributes = True
+
+
+# ---------- Analytics ----------
+class QueryStatsOut(BaseModel):
+    period: datetime
+    college_id: int | None = None
+    intent: str | None = None
+    queries: int
+    unanswered: int
+    avg_latency_ms: float
+    max_latency_ms: float
+
+
+# ---------- Import Job ----------
+class ImportJobOut(BaseModel):
+    id: str
+    entity: str
+    college_id: int
+    status: str
+    mode: str
+    rows_processed: int
+    inserted: int
+    updated: int
+    unchanged: int
+    deleted: int
+    error_count: int
+    errors: list[str] | None = None
+    message: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    rows_per_second: float | None = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,128 @@
+"""
+How long an admin write takes to reach every worker's caches.
+
+Seeds a database, starts uvicorn with several worker processes, warms the
+intent cache in all of them, then changes a fee deadline from a separate process
+(as another worker or node would) and keeps asking each worker's webhook until
+all of them show the new deadline. Runs once per CHANGE_BUS mode so the bus can
+be compared with no bus at all.
+
+    python benchmarks/cross_worker_invalidation.py --workers 4
+    python benchmarks/cross_worker_invalidation.py --database-url postgresql://localhost/polyglot_bench --modes off notify
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from webhook_load import BACKEND_DIR, SECRET, free_port, launch, seed
+
+COLLEGE = "load test college 0"
+COURSE = "MBA"
+
+
+async def ask(client) -> str:
+    body = {"session": "projects/bench/agent/sessions/invalidation",
+            "queryResult": {"intent": {"displayName": "Fee Deadline"}, "queryText": "fee deadline",
+                            "parameters": {"college": COLLEGE, "course": COURSE}}}
+    response = await client.post("/webhook", json=body, headers={"x-dialogflow-secret": SECRET})
+    return response.json()["fulfillmentText"]
+
+
+async def pin_workers(base_url: str, workers: int) -> dict:
+    """
+    One keep-alive connection per worker, keyed by the worker's change bus
+    origin. A connection stays with the worker that accepted it, so each
+    answer can be attributed to its worker.
+    """
+    import httpx
+
+    clients = {}
+    for _ in range(workers * 50):
+        client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=1), timeout=30)
+        worker = (await client.get("/health/changes")).json()["origin"]
+        if worker in clients:
+            await client.aclose()
+        else:
+            clients[worker] = client
+            if len(clients) == workers:
+                return clients
+    for client in clients.values():
+        await client.aclose()
+    raise RuntimeError(f"Reached {len(clients)} of {workers} workers")
+
+
+# Runs in a separate interpreter, standing in for another worker or node.
+WRITER = r"""
+import datetime, sys
+from app import change_bus, models  # importing change_bus broadcasts this process's commits
+from app.database import SessionLocal
+
+db = SessionLocal()
+college = db.query(models.College).filter(models.College.name == "Load Test College 0").one()
+fee = db.query(models.Fee).filter_by(college_id=college.id, program=sys.argv[1]).one()
+fee.deadline = datetime.date.fromisoformat(sys.argv[2])
+db.commit()
+"""
+
+
+def set_deadline(env: dict, deadline: datetime.date):
+    subprocess.check_call([sys.executable, "-c", WRITER, COURSE, deadline.isoformat()], cwd=BACKEND_DIR, env=env)
+
+
+async def measure(base_url: str, env: dict, deadline: datetime.date, workers: int, timeout: float) -> dict:
+    expected = deadline.strftime("%B %d, %Y")
+    clients = await pin_workers(base_url, workers)
+    try:
+        for client in clients.values():
+            await ask(client)  # fill every worker's cache with the old answer
+        await asyncio.to_thread(set_deadline, env, deadline)
+        changed_at = time.perf_counter()
+        stale = 0
+        while time.perf_counter() - changed_at < timeout:
+            answers = await asyncio.gather(*(ask(client) for client in clients.values()))
+            stale_now = sum(expected not in answer for answer in answers)
+            stale += stale_now
+            if not stale_now:
+                return {"converged_s": time.perf_counter() - changed_at, "stale_answers": stale}
+            await asyncio.sleep(0.05)
+        return {"converged_s": None, "stale_answers": stale}
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=20, help="seconds to wait for every worker to catch up")
+    parser.add_argument("--modes", nargs="+", default=["off", "auto"], help="CHANGE_BUS modes to compare")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'invalidation.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    seed(colleges=2)
+
+    print(f"{args.workers} workers, one request to each per check")
+    for i, mode in enumerate(args.modes):
+        env = dict(os.environ, DIALOGFLOW_SECRET=SECRET, CHANGE_BUS=mode)
+        port = free_port()
+        server = launch(env, port, args.workers)
+        try:
+            time.sleep(1)  # let every worker start its listener
+            deadline = datetime.date(2027, 1, 1) + datetime.timedelta(days=i)
+            result = asyncio.run(measure(f"http://127.0.0.1:{port}", env, deadline, args.workers, args.timeout))
+        finally:
+            server.terminate()
+            server.wait(10)
+        converged = f"{result['converged_s']:.2f}s" if result["converged_s"] is not None else f"not within {args.timeout:.0f}s"
+        print(f"  CHANGE_BUS={mode:<7} all workers current after {converged}, {result['stale_answers']} stale answers")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
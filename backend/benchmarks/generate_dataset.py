@@ -0,0 +1,331 @@
+"""
+Fills the database with a synthetic but realistic dataset for scale testing:
+colleges with departments, FAQs, fees, holidays, admissions, scholarships,
+timetables, and conversation logs with their hourly rollups.
+
+Rows are written in batches through the same bulk path as CSV imports
+(COPY on Postgres, multi-row INSERT elsewhere). The output depends only on
+--seed, the size options and --log-end (fixed by default), not on the
+batch size or the clock, so benchmark numbers are reproducible.
+
+    python benchmarks/generate_dataset.py --database-url postgresql://localhost/polyglot_scale \\
+        --colleges 2000 --faqs 500 --fees 500 --logs 10000000
+
+Sizes for FAQs, fees, holidays, admissions, scholarships and timetables are
+per college; --logs is a total. Run it against an empty database; ids for
+colleges and departments are assigned after the highest existing one.
+"""
+import argparse
+import datetime
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+CITIES = ["Bhopal", "Delhi", "Mumbai", "Chennai", "Kolkata", "Pune", "Jaipur", "Lucknow", "Patna", "Indore",
+          "Nagpur", "Surat", "Kanpur", "Ranchi", "Guwahati", "Dehradun", "Raipur", "Kochi", "Mysuru", "Vadodara",
+          "Warangal", "Trichy", "Silchar", "Hamirpur", "Kurukshetra", "Jalandhar", "Agartala", "Calicut"]
+INSTITUTE_KINDS = ["Institute of Technology", "Engineering College", "University", "College of Science",
+                   "Institute of Management", "Polytechnic", "Institute of Information Technology"]
+PREFIXES = ["National", "Government", "Regional", "State", "Central", "Indian", "Maulana Azad", "Sardar Patel"]
+DEPARTMENTS = ["Computer Science", "Electronics", "Mechanical", "Civil", "Electrical", "Chemical",
+               "Mathematics", "Physics", "Management", "Humanities"]
+DEGREES = ["B.Tech", "M.Tech", "B.Sc", "M.Sc", "BCA", "MCA", "MBA", "PhD"]
+BRANCHES = ["CSE", "ECE", "ME", "CE", "EE", "Chemical", "AI", "Data Science", "IT", "Biotech",
+            "Physics", "Mathematics", "Finance", "Marketing"]
+HOLIDAYS = ["Republic Day", "Holi", "Good Friday", "Eid ul-Fitr", "Independence Day", "Raksha Bandhan",
+            "Janmashtami", "Gandhi Jayanti", "Dussehra", "Diwali", "Guru Nanak Jayanti", "Christmas",
+            "Winter Break", "Summer Vacation", "Foundation Day", "Mid-semester Break"]
+FAQ_TEMPLATES = [
+    ("hostel", "Is there a {topic} facility in the hostel?", "Yes, the hostel has {topic} for all residents."),
+    ("fees", "How can I pay the {topic} fee?", "The {topic} fee can be paid online through the student portal."),
+    ("campus", "Where is the {topic} located?", "The {topic} is next to the main academic block."),
+    ("academics", "When does the {topic} start?", "The {topic} starts in the second week of the semester."),
+    ("documents", "How do I get a {topic} certificate?", "Apply for the {topic} certificate at the academic section."),
+    ("placements", "Which companies visit for {topic}?", "Over 100 companies visit every year for {topic}."),
+]
+FAQ_TOPICS = ["gym", "library", "canteen", "wifi", "laundry", "medical", "transport", "sports", "exam",
+              "bonafide", "migration", "internship", "orientation", "lab", "convocation", "placement",
+              "scholarship", "mess", "counselling", "bank"]
+ELIGIBILITY = ["10+2 with PCM and JEE Main rank", "Graduation with 60% marks", "Valid GATE score",
+               "10+2 in any stream", "CAT/MAT score and graduation", "Master's degree with NET"]
+PROCESSES = ["Centralised counselling (JoSAA)", "Entrance test followed by interview", "Merit list on qualifying marks",
+             "Online application and document verification"]
+SCHOLARSHIPS = ["Merit", "Means-cum-Merit", "Post-Matric", "Girls in STEM", "Sports Excellence", "Alumni Endowment",
+                "Central Sector", "Minority", "Research Fellowship", "First Generation Learner"]
+# Log rows are generated in blocks of this many, each from its own seed.
+LOG_BLOCK_SIZE = 10_000
+# Logs end here unless --log-end is given, so the same seed gives the same
+# timestamps on every run.
+DEFAULT_LOG_END = "2026-01-01"
+INTENTS = ["Fee Deadline", "Holiday Query", "FAQ Query", "Admission Query", "Scholarship Query", "Timetable Query"]
+
+
+def _rng(seed, *parts) -> random.Random:
+    # One generator per (table, college) keeps each college's rows the same
+    # whatever the batch size or the sizes of the other tables.
+    return random.Random(":".join(str(p) for p in (seed,) + parts))
+
+
+def _programs():
+    return [f"{degree} {branch}" for degree, branch in itertools.product(DEGREES, BRANCHES)]
+
+
+def college_rows(start_id, count, seed):
+    rng = _rng(seed, "colleges")
+    names = [f"{prefix} {kind}, {city}" for prefix, kind, city in itertools.product(PREFIXES, INSTITUTE_KINDS, CITIES)]
+    rng.shuffle(names)
+    for i in range(count):
+        name = names[i % len(names)]
+        city = name.rsplit(", ", 1)[1]
+        if i >= len(names):
+            name = f"{name} Campus {i // len(names) + 1}"
+        yield dict(id=start_id + i, name=name, domain=f"c{start_id + i}.{city.lower()}.ac.in", location=city)
+
+
+def department_rows(college_ids, per_college, start_id):
+    dept_id = start_id
+    for college_id in college_ids:
+        for name in DEPARTMENTS[:per_college]:
+            yield dict(id=dept_id, college_id=college_id, dept_name=name)
+            dept_id += 1
+
+
+def faq_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "faqs", college_id)
+    for i in range(count):
+        category, question, answer = FAQ_TEMPLATES[i % len(FAQ_TEMPLATES)]
+        topic = FAQ_TOPICS[(i // len(FAQ_TEMPLATES)) % len(FAQ_TOPICS)]
+        round_ = i // (len(FAQ_TEMPLATES) * len(FAQ_TOPICS))
+        suffix = f" (campus {round_ + 1})" if round_ else ""
+        yield dict(college_id=college_id, dept_id=rng.choice(depts) if depts and rng.random() < 0.3 else None,
+                   category=category, question=question.format(topic=topic) + suffix,
+                   answer=answer.format(topic=topic), language="en")
+
+
+def fee_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "fees", college_id)
+    programs = _programs()
+    for i in range(count):
+        program = programs[(i // 4) % len(programs)]
+        round_ = i // (len(programs) * 4)
+        yield dict(college_id=college_id, dept_id=rng.choice(depts) if depts else None,
+                   program=program + (f" (Batch {round_ + 1})" if round_ else ""), year=i % 4 + 1,
+                   amount=float(rng.randrange(20, 400) * 500),
+                   deadline=datetime.date(2026, rng.randint(6, 9), rng.randint(1, 28)))
+
+
+def holiday_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "holidays", college_id)
+    for i in range(count):
+        start = datetime.date(2026, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+        name = HOLIDAYS[i % len(HOLIDAYS)] + (f" {i // len(HOLIDAYS) + 1}" if i >= len(HOLIDAYS) else "")
+        yield dict(college_id=college_id, dept_id=None, holiday_name=name, start_date=start,
+                   end_date=start + datetime.timedelta(days=rng.choice((0, 0, 1, 2, 6))))
+
+
+def admission_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "admissions", college_id)
+    programs = _programs()
+    for i in range(count):
+        yield dict(college_id=college_id, dept_id=rng.choice(depts) if depts else None,
+                   course=programs[i % len(programs)] + (f" ({i // len(programs) + 1})" if i >= len(programs) else ""),
+                   eligibility=rng.choice(ELIGIBILITY), process=rng.choice(PROCESSES),
+                   last_date=datetime.date(2026, rng.randint(4, 7), rng.randint(1, 28)))
+
+
+def scholarship_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "scholarships", college_id)
+    for i in range(count):
+        yield dict(college_id=college_id, name=f"{SCHOLARSHIPS[i % len(SCHOLARSHIPS)]} Scholarship {i + 1}",
+                   eligibility=f"{rng.choice(DEGREES)} students with {rng.choice((60, 70, 75, 80, 85))}% marks",
+                   amount=float(rng.randrange(5, 100) * 1000),
+                   deadline=datetime.date(2026, rng.randint(6, 12), rng.randint(1, 28)))
+
+
+def timetable_rows(college_id, depts, count, seed):
+    rng = _rng(seed, "timetables", college_id)
+    programs = _programs()
+    for i in range(count):
+        program = programs[(i // 8) % len(programs)]
+        semester = i % 8 + 1
+        yield dict(college_id=college_id, dept_id=rng.choice(depts) if depts else None, course=program,
+                   year=(semester + 1) // 2, semester=semester,
+                   timetable_url=f"https://c{college_id}.ac.in/timetables/{program.replace(' ', '-').lower()}-s{semester}.pdf")
+
+
+def log_rows(college_ids, count, days, end, seed, batch_size):
+    """
+    Yields batches of log rows spread evenly over the `days` days before
+    `end`, in time order, so ids and timestamps grow together as they do in
+    production. The random stream is reseeded every LOG_BLOCK_SIZE rows
+    rather than per batch, so --batch-size doesn't change the rows.
+    """
+    start = end - datetime.timedelta(days=days)
+    step = (end - start).total_seconds() / max(count, 1)
+    programs = _programs()
+    batch = []
+    for i in range(count):
+        if i % LOG_BLOCK_SIZE == 0:
+            rng = _rng(seed, "logs", i // LOG_BLOCK_SIZE)
+        intent = rng.choice(INTENTS)
+        answered = rng.random() > 0.12
+        topic = rng.choice(FAQ_TOPICS) if intent == "FAQ Query" else rng.choice(programs)
+        batch.append(dict(
+            college_id=rng.choice(college_ids) if rng.random() > 0.05 else None,
+            user_id=f"projects/polyglot/agent/sessions/{rng.randrange(count // 8 + 1)}",
+            query=f"{intent.split()[0].lower()} {topic}",
+            bot_response=f"Here is the {intent.lower()} information for {topic}." if answered
+            else f"Sorry, I couldn't find information for {topic}.",
+            intent=intent,
+            answered=answered,
+            latency_ms=round(rng.lognormvariate(math.log(25), 0.6), 2),
+            timestamp=start + datetime.timedelta(seconds=i * step + rng.random() * step),
+        ))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Writer:
+    """
+    Buffers rows per model and writes them in batches, committing each one.
+    """
+
+    def __init__(self, db, batch_size):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        from app.importers import bulk_insert
+
+        for m in [model] if model else list(self.buffers):
+            rows = self.buffers.get(m)
+            if rows:
+                bulk_insert(self.db, m, rows)
+                self.db.commit()
+                self.counts[m.__tablename__] = self.counts.get(m.__tablename__, 0) + len(rows)
+                self.buffers[m] = []
+
+
+def _prepare(model, row, spec=None):
+    from app import importers, models
+
+    for m, source, search in models.SEARCH_COLUMNS:
+        if m is model:
+            row[search] = models.normalize_name(row[source])
+    if spec is not None:
+        row["row_hash"] = importers.row_hash(row, spec.fields)
+    return row
+
+
+def _reset_sequences(db, tables):
+    # Explicit ids don't advance Postgres sequences; move them past the new rows.
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    from sqlalchemy import text
+
+    for table in tables:
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--colleges", type=int, default=1000)
+    parser.add_argument("--departments", type=int, default=5, help=f"per college, at most {len(DEPARTMENTS)}")
+    parser.add_argument("--faqs", type=int, default=200, help="per college")
+    parser.add_argument("--fees", type=int, default=200, help="per college")
+    parser.add_argument("--holidays", type=int, default=16, help="per college")
+    parser.add_argument("--admissions", type=int, default=20, help="per college")
+    parser.add_argument("--scholarships", type=int, default=10, help="per college")
+    parser.add_argument("--timetables", type=int, default=40, help="per college")
+    parser.add_argument("--logs", type=int, default=1_000_000, help="total")
+    parser.add_argument("--log-days", type=int, default=90, help="spread logs over this many days")
+    parser.add_argument("--log-end", type=datetime.date.fromisoformat, default=DEFAULT_LOG_END,
+                        help="date (UTC midnight) the logs end at, e.g. 2026-01-01")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import func, select
+    from app import database, models
+    from app.importers import IMPORT_SPECS, bulk_insert
+    from app.log_sink import rollup_rows, upsert_rollups
+
+    database.Base.metadata.create_all(bind=database.engine)
+    models.sync_schema(database.engine)
+    db = database.SessionLocal()
+    writer = Writer(db, args.batch_size)
+    started = time.perf_counter()
+
+    def report(label, count, since):
+        elapsed = time.perf_counter() - since
+        print(f"  {label:<14} {count:>12,} rows  {elapsed:8.1f}s  {count / elapsed if elapsed else 0:>10,.0f} rows/s")
+
+    try:
+        print(f"Generating into {database.engine.url.render_as_string(hide_password=True)} (seed {args.seed})")
+        since = time.perf_counter()
+        first_college = (db.scalar(select(func.max(models.College.id))) or 0) + 1
+        first_dept = (db.scalar(select(func.max(models.Department.id))) or 0) + 1
+        for row in college_rows(first_college, args.colleges, args.seed):
+            writer.add(models.College, row)
+        writer.flush()
+        college_ids = list(range(first_college, first_college + args.colleges))
+        departments = {}
+        for row in department_rows(college_ids, min(args.departments, len(DEPARTMENTS)), first_dept):
+            writer.add(models.Department, row)
+            departments.setdefault(row["college_id"], []).append(row["id"])
+        writer.flush()
+        _reset_sequences(db, ["colleges", "departments"])
+        report("colleges", args.colleges, since)
+
+        content = [
+            (models.FAQ, "faqs", faq_rows, args.faqs),
+            (models.Fee, "fees", fee_rows, args.fees),
+            (models.Holiday, "holidays", holiday_rows, args.holidays),
+            (models.Admission, "admissions", admission_rows, args.admissions),
+            (models.Scholarship, "scholarships", scholarship_rows, args.scholarships),
+            (models.Timetable, "timetables", timetable_rows, args.timetables),
+        ]
+        for model, entity, rows, per_college in content:
+            since = time.perf_counter()
+            for college_id in college_ids:
+                for row in rows(college_id, departments.get(college_id, []), per_college, args.seed):
+                    writer.add(model, _prepare(model, row, IMPORT_SPECS[entity]))
+            writer.flush()
+            report(entity, per_college * len(college_ids), since)
+
+        since = time.perf_counter()
+        log_end = datetime.datetime.combine(args.log_end, datetime.time(), datetime.timezone.utc)
+        for batch in log_rows(college_ids, args.logs, args.log_days, log_end, args.seed, args.batch_size):
+            bulk_insert(db, models.Log, batch)
+            upsert_rollups(db, rollup_rows(batch))
+            db.commit()
+        report("logs", args.logs, since)
+    finally:
+        db.close()
+
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
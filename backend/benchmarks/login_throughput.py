@@ -0,0 +1,105 @@
+"""
+/auth/login throughput, and /webhook latency during a burst of logins, with
+bcrypt run inline on the event loop versus offloaded to the hash thread pool.
+
+Runs the app in-process against a throwaway SQLite database.
+
+    python benchmarks/login_throughput.py --logins 64 --concurrency 16 --rounds 12
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("DIALOGFLOW_SECRET", "bench-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+from app import auth, database, models
+from app.main import app
+
+PASSWORD = "bench-password"
+
+
+def seed(users):
+    db = database.SessionLocal()
+    college = models.College(name="N.I.T. Bhopal", domain="nitbh.ac.in", location="Bhopal")
+    db.add(college)
+    db.flush()
+    db.add(models.Holiday(college_id=college.id, holiday_name="Diwali",
+                          start_date=datetime.date(2026, 11, 1), end_date=datetime.date(2026, 11, 5)))
+    hashed = auth.get_password_hash(PASSWORD)
+    for i in range(users):
+        db.add(models.User(username=f"user{i}", email=f"user{i}@bench.test", hashed_password=hashed, role="admin"))
+    db.commit()
+    db.close()
+
+
+async def run(logins, concurrency, users):
+    semaphore = asyncio.Semaphore(concurrency)
+    webhook = {"queryResult": {"intent": {"displayName": "Holiday Query"}, "queryText": "holidays",
+                               "parameters": {"college": "nit bhopal"}}}
+    headers = {"x-dialogflow-secret": os.environ["DIALOGFLOW_SECRET"]}
+    transport = httpx.ASGITransport(app=app)
+    webhook_latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i):
+            async with semaphore:
+                r = await client.post("/auth/login", data={"username": f"user{i % users}", "password": PASSWORD})
+                r.raise_for_status()
+
+        async def probe():
+            # One webhook call at a time while the logins run
+            while not done.is_set():
+                start = time.perf_counter()
+                r = await client.post("/webhook", json=webhook, headers=headers)
+                r.raise_for_status()
+                webhook_latencies.append((time.perf_counter() - start) * 1000)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    return elapsed, webhook_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=auth.BCRYPT_ROUNDS, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    auth.pwd_context.update(bcrypt__rounds=args.rounds)
+    seed(args.users)
+    workers = auth.PASSWORD_HASH_WORKERS or 2
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, bcrypt rounds {args.rounds}")
+    for label, pool_size in (("inline (before)", 0), (f"offload x{workers} (after)", workers)):
+        auth.PASSWORD_HASH_WORKERS = pool_size
+        auth._hash_limiter = None
+        elapsed, latencies = asyncio.run(run(args.logins, args.concurrency, args.users))
+        p50 = statistics.median(latencies)
+        worst = max(latencies)
+        print(f"  {label:<24} {args.logins / elapsed:7.1f} logins/s   "
+              f"webhook during burst: p50 {p50:7.1f} ms  max {worst:7.1f} ms  ({len(latencies)} calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Queries issued for reference-row lookups (colleges, departments, users)
+with the reference cache off and on. Each lookup runs in a fresh session,
+as it would in a separate request.
+
+    python benchmarks/reference_queries.py --lookups 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from webhook_load import BACKEND_DIR
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=200, help="lookups per scenario")
+    parser.add_argument("--colleges", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'reference.db')}")
+    from app import models, profiling
+    from app.auth import get_user_by_email
+    from app.database import SessionLocal, engine
+    from app.reference_cache import get_by, reference_cache
+    from app.schema import create_schema
+
+    create_schema(engine)
+    profiling.instrument_engine(engine)
+    db = SessionLocal()
+    for c in range(args.colleges):
+        college = models.College(name=f"Reference College {c}", domain=f"ref{c}.edu", location="Bench")
+        db.add(college)
+        db.flush()
+        db.add(models.Department(college_id=college.id, dept_name="CSE"))
+        db.add(models.User(username=f"admin{c}", email=f"admin{c}@ref{c}.edu", hashed_password="x", role="admin"))
+    db.commit()
+    db.close()
+
+    scenarios = {
+        "db.get(College)": lambda db, i: db.get(models.College, i % args.colleges + 1),
+        "Department.college": lambda db, i: db.get(models.Department, i % args.colleges + 1).college,
+        "College by name": lambda db, i: get_by(db, models.College, name=f"Reference College {i % args.colleges}"),
+        "User by email": lambda db, i: get_user_by_email(db, f"admin{i % args.colleges}@ref{i % args.colleges}.edu"),
+    }
+
+    size = reference_cache.max_size
+    print(f"queries for {args.lookups} lookups over {args.colleges} rows")
+    print(f"  {'lookup':<22} {'off':>6} {'on':>6}")
+    for label, lookup in scenarios.items():
+        counts = []
+        for max_size in (0, size):
+            reference_cache.max_size = max_size
+            reference_cache.clear()
+            with profiling.profile_queries() as profile:
+                for i in range(args.lookups):
+                    db = SessionLocal()
+                    try:
+                        lookup(db, i)
+                    finally:
+                        db.close()
+            counts.append(profile.count)
+        print(f"  {label:<22} {counts[0]:>6} {counts[1]:>6}")
+
+
+if __name__ == "__main__":
+    main()
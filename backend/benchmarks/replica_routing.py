@@ -0,0 +1,127 @@
+"""
+Checks read-replica routing against a running server: webhook and list
+reads use the replica, an admin reads their own writes right away, and a
+replica that can't be reached is skipped.
+
+By default the "replica" is a copy of a throwaway SQLite primary taken
+after seeding, so anything written afterwards exists only on the primary and
+shows which database answered. With real databases, pass both URLs (the
+replica must already be replicating from the primary):
+
+    python benchmarks/replica_routing.py
+    python benchmarks/replica_routing.py --primary-url postgresql://localhost:5432/polyglot \\
+        --replica-url postgresql://localhost:5433/polyglot
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from webhook_load import BACKEND_DIR, SECRET, free_port, launch, make_payloads, seed
+
+STICKY_SECONDS = 2
+ADMIN = {"username": "replica-admin", "email": "replica-admin@bench.local", "password": "replica-check"}
+
+# Runs in a separate interpreter so the app modules pick up the primary URL.
+CREATE_ADMIN = r"""
+import sys
+from app import auth, models
+from app.database import SessionLocal
+
+db = SessionLocal()
+db.add(models.User(username=sys.argv[1], email=sys.argv[2], hashed_password=auth.get_password_hash(sys.argv[3]),
+                   role="admin"))
+db.commit()
+"""
+
+
+def replica_checkouts(client) -> int:
+    return sum(replica["pool"].get("checkouts", 0) for replica in client.get("/health/db").json()["replicas"])
+
+
+def webhook_reads(client, count: int):
+    statuses = []
+    for _, body in make_payloads(2, count, seed_value=time.time_ns()):
+        statuses.append(client.post("/webhook", json=body, headers={"x-dialogflow-secret": SECRET}).status_code)
+    return statuses
+
+
+def fee_programs(client, headers) -> set:
+    return {fee["program"] for fee in client.get("/fees/", params={"limit": 1000}, headers=headers).json()}
+
+
+def main():
+    import httpx
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--primary-url")
+    parser.add_argument("--replica-url")
+    args = parser.parse_args()
+
+    copied = not args.primary_url
+    if copied:
+        directory = tempfile.mkdtemp()
+        primary_url = f"sqlite:///{os.path.join(directory, 'primary.db')}"
+        replica_url = f"sqlite:///{os.path.join(directory, 'replica.db')}"
+    else:
+        primary_url, replica_url = args.primary_url, args.replica_url
+    os.environ["DATABASE_URL"] = primary_url
+    seed(colleges=2)
+    env = dict(os.environ, DATABASE_URL=primary_url, DIALOGFLOW_SECRET=SECRET)
+    env.setdefault("JWT_SECRET_KEY", "replica-check")
+    env.setdefault("JWT_ALGORITHM", "HS256")
+    subprocess.check_call([sys.executable, "-c", CREATE_ADMIN, ADMIN["username"], ADMIN["email"], ADMIN["password"]],
+                          cwd=BACKEND_DIR, env=env)
+    if copied:
+        shutil.copy(primary_url.split("///", 1)[1], replica_url.split("///", 1)[1])
+
+    env.update(DATABASE_REPLICA_URLS=replica_url, REPLICA_STICKY_SECONDS=str(STICKY_SECONDS))
+    port = free_port()
+    server = launch(env, port, workers=1)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=base_url, timeout=30) as admin, httpx.Client(base_url=base_url, timeout=30) as other:
+            before = replica_checkouts(other)
+            statuses = webhook_reads(other, 30)
+            print(f"webhook: {statuses.count(200)}/{len(statuses)} ok, "
+                  f"{replica_checkouts(other) - before} replica connection checkouts")
+
+            token = admin.post("/auth/login", data={"username": ADMIN["email"], "password": ADMIN["password"]}).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+            program = f"Replica Check {time.time_ns()}"
+            admin.post("/fees/", headers=headers,
+                       json={"college_id": 1, "program": program, "year": 1, "amount": 1, "deadline": "2026-08-01"})
+            print(f"read-your-writes: new fee listed for the admin right away: {program in fee_programs(admin, headers)} "
+                  f"(sticky cookie set: {'db_primary_until' in admin.cookies})")
+
+            time.sleep(STICKY_SECONDS + 1)
+            if copied:
+                # The copy never receives the new row, so seeing it means the read went to the primary.
+                print(f"after {STICKY_SECONDS}s: list read from the replica: {program not in fee_programs(other, headers)}")
+            else:
+                print(f"after {STICKY_SECONDS}s: new fee visible on the replica: {program in fee_programs(other, headers)}")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    # A replica that can't be reached is taken out of rotation.
+    missing = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'missing', 'replica.db')}"
+    env.update(DATABASE_REPLICA_URLS=f"{missing},{replica_url}", REPLICA_CHECK_INTERVAL="1")
+    port = free_port()
+    server = launch(env, port, workers=1)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            time.sleep(1.5)  # one health check round
+            statuses = webhook_reads(client, 30)
+            healthy = [replica["healthy"] for replica in client.get("/health/db").json()["replicas"]]
+            print(f"failover: {statuses.count(200)}/{len(statuses)} ok with one replica down (healthy: {healthy})")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Worker cold-start time: importing app.main, then the first /webhook answer
+and the first /admin page, each measured in a fresh interpreter. Compares
+schema creation at import (the old behaviour) with SCHEMA_AUTO_CREATE=0,
+where `python -m app.schema` has already run as a separate step.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --database-url postgresql://localhost/polyglot_bench
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Runs in the child interpreter; prints one JSON line of timings in seconds.
+PROBE = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import httpx
+from app.main import app
+imported = time.perf_counter()
+
+async def first_requests():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = {"queryResult": {"intent": {"displayName": "Holiday Query"}, "queryText": "holidays",
+                                "parameters": {"college": "nit bhopal"}}}
+        await client.post("/webhook", json=body, headers={"x-dialogflow-secret": "bench"})
+        webhook = time.perf_counter()
+        await client.get("/admin/login")
+        return webhook, time.perf_counter()
+
+webhook, admin = asyncio.run(first_requests())
+print(json.dumps({"import": imported - started, "first_webhook": webhook - started,
+                  "first_admin": admin - webhook}))
+"""
+
+
+def measure(env: dict) -> dict:
+    output = subprocess.check_output([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, text=True,
+                                     stderr=subprocess.DEVNULL)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, DIALOGFLOW_SECRET="bench")
+    subprocess.check_call([sys.executable, "-m", "app.schema"], cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL)
+
+    print(f"median of {args.runs} runs, seconds")
+    print(f"  {'mode':<28} {'import':>8} {'webhook':>8} {'admin':>8}")
+    for label, auto_create in (("schema at import (before)", "1"), ("separate schema step (after)", "0")):
+        runs = [measure(dict(env, SCHEMA_AUTO_CREATE=auto_create)) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"  {label:<28} {medians['import']:8.3f} {medians['first_webhook']:8.3f} {medians['first_admin']:8.3f}")
+    print("  (webhook: from start of import to first answer; admin: first /admin page, built lazily)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Concurrent-request throughput of the /webhook endpoint, with intent handlers
+run inline on the event loop versus offloaded to the database thread pool.
+
+Runs the app in-process against a throwaway SQLite database and adds an
+artificial delay to every SQL statement to stand in for network round trips
+to a real database server.
+
+    python benchmarks/webhook_concurrency.py --requests 400 --concurrency 32 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("DIALOGFLOW_SECRET", "bench-secret")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from sqlalchemy import event
+
+from app import database, models
+from app.main import app
+
+
+def seed():
+    db = database.SessionLocal()
+    college = models.College(name="N.I.T. Bhopal", domain="nitbh.ac.in", location="Bhopal")
+    db.add(college)
+    db.flush()
+    for i in range(50):
+        db.add(models.Fee(college_id=college.id, program=f"B.Tech {i}", year=1, amount=1000 + i,
+                          deadline=datetime.date(2026, 7, 1)))
+        db.add(models.Holiday(college_id=college.id, holiday_name=f"Holiday {i}",
+                              start_date=datetime.date(2026, 1, 1), end_date=datetime.date(2026, 1, 2)))
+    db.commit()
+    db.close()
+
+
+def add_db_latency(latency_ms):
+    @event.listens_for(database.engine, "before_cursor_execute")
+    def _sleep(*args):
+        time.sleep(latency_ms / 1000)
+
+
+async def run(total, concurrency):
+    payloads = [
+        {"queryResult": {"intent": {"displayName": "Fee Deadline"}, "queryText": "fee deadline",
+                         "parameters": {"college": "nit bhopal", "course": "btech 7"}}},
+        {"queryResult": {"intent": {"displayName": "Holiday Query"}, "queryText": "holidays",
+                         "parameters": {"college": "nit bhopal"}}},
+    ]
+    headers = {"x-dialogflow-secret": os.environ["DIALOGFLOW_SECRET"]}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                r = await client.post("/webhook", json=payloads[i % len(payloads)], headers=headers)
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    seed()
+    add_db_latency(args.db_latency_ms)
+    offload_size = database.DB_THREADPOOL_SIZE or 16
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.db_latency_ms} ms per statement")
+    for label, pool_size in (("inline (before)", 0), (f"offload x{offload_size} (after)", offload_size)):
+        database.DB_THREADPOOL_SIZE = pool_size
+        elapsed = asyncio.run(run(args.requests, args.concurrency))
+        print(f"  {label:<24} {elapsed:7.2f}s  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+End-to-end load test of the Dialogflow /webhook endpoint.
+
+Seeds a database, launches the app with uvicorn as a separate process and
+sends synthetic `queryResult` payloads for every intent in INTENT_HANDLERS
+at a fixed concurrency. Reports throughput and p50/p95/p99 latency per
+intent and writes the results as JSON, so runs can be compared across
+commits.
+
+    python benchmarks/webhook_load.py --requests 5000 --concurrency 64
+    python benchmarks/webhook_load.py --database-url postgresql://localhost/polyglot_bench --workers 4
+
+Without --database-url a throwaway SQLite database is used. Pass --no-seed
+to run against a database that already has data (e.g. one built with the
+dataset generator).
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SECRET = "load-test-secret"
+
+COURSES = ["B.Tech CSE", "B.Tech ECE", "B.Tech ME", "M.Tech AI", "MBA", "BCA", "MCA", "B.Sc Physics"]
+FAQS = [
+    ("Is there a hostel?", "Yes, separate hostels for boys and girls."),
+    ("Where is the library?", "The central library is next to the main building."),
+    ("Is there a gym?", "Yes, near hostel 3."),
+    ("How do I get a bonafide certificate?", "Apply at the academic section."),
+    ("What is the canteen timing?", "8 AM to 10 PM."),
+]
+
+
+def seed(colleges: int):
+    """
+    Creates the schema and `colleges` colleges with fees, FAQs, holidays,
+    admissions, scholarships and timetables for every course.
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    from app import database, models
+
+    database.Base.metadata.create_all(bind=database.engine)
+    models.sync_schema(database.engine)
+    db = database.SessionLocal()
+    try:
+        for c in range(colleges):
+            college = models.College(name=f"Load Test College {c}", domain=f"ltc{c}.edu", location="Bench")
+            db.add(college)
+            db.flush()
+            for course in COURSES:
+                db.add(models.Fee(college_id=college.id, program=course, year=1, amount=50000 + c,
+                                  deadline=datetime.date(2026, 7, 1)))
+                db.add(models.Admission(college_id=college.id, course=course, eligibility="12th pass",
+                                        process="Entrance exam", last_date=datetime.date(2026, 5, 1)))
+                db.add(models.Scholarship(college_id=college.id, name=f"{course} Merit", eligibility=f"{course} students",
+                                          amount=10000, deadline=datetime.date(2026, 6, 1)))
+                for semester in (1, 2):
+                    db.add(models.Timetable(college_id=college.id, course=course, year=1, semester=semester,
+                                            timetable_url=f"https://ltc{c}.edu/tt/{semester}.pdf"))
+            for question, answer in FAQS:
+                db.add(models.FAQ(college_id=college.id, category="general", question=question, answer=answer))
+            db.add(models.Holiday(college_id=college.id, holiday_name="Diwali",
+                                  start_date=datetime.date(2026, 11, 1), end_date=datetime.date(2026, 11, 5)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def make_payloads(colleges: int, count: int, seed_value: int):
+    """
+    Deterministic mix of requests, evenly spread over the six intents. About
+    one in ten asks for something that doesn't exist.
+    """
+    rng = random.Random(seed_value)
+    builders = {
+        "Fee Deadline": lambda college: {"college": college, "course": rng.choice(COURSES)},
+        "Holiday Query": lambda college: {"college": college},
+        "FAQ Query": lambda college: {"college": college, "query_text": rng.choice(FAQS)[0].lower()},
+        "Admission Query": lambda college: {"college": college, "course": rng.choice(COURSES)},
+        "Scholarship Query": lambda college: {"college": college, "course": rng.choice(COURSES)},
+        "Timetable Query": lambda college: {"college": college, "course": rng.choice(COURSES),
+                                            "semester": float(rng.choice((1, 2)))},
+    }
+    intents = list(builders)
+    payloads = []
+    for i in range(count):
+        intent = intents[i % len(intents)]
+        c = rng.randrange(colleges)
+        college = f"load test college {c}" if rng.random() > 0.1 else f"missing college {c}"
+        parameters = builders[intent](college)
+        payloads.append((intent, {
+            "session": f"projects/bench/agent/sessions/{i % 500}",
+            "queryResult": {"intent": {"displayName": intent}, "queryText": intent.lower(), "parameters": parameters},
+        }))
+    return payloads
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch(env: dict, port: int, workers: int):
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60s")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run(base_url: str, payloads, concurrency: int, warmup: int):
+    import httpx
+
+    queue = asyncio.Queue()
+    for item in payloads:
+        queue.put_nowait(item)
+    samples = {}  # intent -> list of latencies (ms)
+    errors = {}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        headers = {"x-dialogflow-secret": SECRET}
+        for intent, body in payloads[:warmup]:
+            await client.post("/webhook", json=body, headers=headers)
+
+        async def worker():
+            while True:
+                try:
+                    intent, body = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/webhook", json=body, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = (time.perf_counter() - started) * 1000
+                if ok:
+                    samples.setdefault(intent, []).append(elapsed)
+                else:
+                    errors[intent] = errors.get(intent, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, samples, errors
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else None,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=100, help="untimed requests sent first")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--colleges", type=int, default=50, help="colleges to seed")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the request mix")
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    parser.add_argument("--no-seed", action="store_true", help="use the data already in --database-url")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/webhook_load-<commit>.json)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    env = dict(os.environ, DATABASE_URL=database_url, DIALOGFLOW_SECRET=SECRET)
+    if not args.no_seed:
+        seed(args.colleges)
+
+    port = free_port()
+    server = launch(env, port, args.workers)
+    try:
+        payloads = make_payloads(args.colleges, args.requests, args.seed)
+        elapsed, samples, errors = asyncio.run(run(f"http://127.0.0.1:{port}", payloads, args.concurrency, args.warmup))
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    completed = sum(len(v) for v in samples.values())
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": database_url.split("://", 1)[0],
+        "settings": {k: getattr(args, k) for k in ("requests", "concurrency", "warmup", "workers", "colleges", "seed")},
+        "elapsed_s": elapsed,
+        "throughput_rps": completed / elapsed if elapsed else None,
+        "errors": sum(errors.values()),
+        "overall": summarize([ms for v in samples.values() for ms in v]),
+        "intents": {
+            intent: dict(summarize(samples.get(intent, [])), errors=errors.get(intent, 0))
+            for intent in sorted(set(samples) | set(errors))
+        },
+    }
+
+    print(f"{completed} requests in {elapsed:.2f}s, {results['throughput_rps']:.1f} req/s, "
+          f"{results['errors']} errors (concurrency {args.concurrency}, {args.workers} worker(s))")
+    print(f"  {'intent':<20} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for intent, stats in list(results["intents"].items()) + [("overall", results["overall"])]:
+        if stats["requests"]:
+            print(f"  {intent:<20} {stats['requests']:>6} {stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f}")
+
+    output = args.output or os.path.join(BACKEND_DIR, "benchmarks", "results", f"webhook_load-{results['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
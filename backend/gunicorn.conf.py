@@ -0,0 +1,36 @@
+# Gunicorn reads this file from the working directory (backend/ on Render),
+# so the start command in render.yaml picks it up without extra flags.
+import os
+import shutil
+import tempfile
+
+# Import the app once in the master and fork warm workers from it. Workers
+# must not reuse database connections the master opened while importing.
+preload_app = os.getenv("GUNICORN_PRELOAD_APP", "0").lower() in ("1", "true", "yes")
+
+# Each worker writes its Prometheus samples here and /metrics merges them, so
+# the numbers cover all workers whichever one answers the scrape.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "polyglot-prometheus")
+)
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be added to this one's.
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.database import engine, replicas
+
+        # Drop the inherited pools without closing the master's sockets.
+        for inherited in [engine, *replicas.engines]:
+            inherited.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,61 @@
+import itertools
+import os
+import tempfile
+
+# The app reads its settings at import time, so these come first.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.update(
+    DIALOGFLOW_SECRET="test-dialogflow-secret",
+    JWT_SECRET_KEY="test-jwt-secret",
+    JWT_ALGORITHM="HS256",
+    ADMIN_SECRET_KEY="test-admin-secret",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+
+_names = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    admin = {"username": "admin", "email": "admin@test.local", "password": "test-password", "role": "admin"}
+    response = client.post("/auth/create-admin", json=admin, headers={"x-admin-secret": "test-admin-secret"})
+    assert response.status_code == 201, response.text
+    response = client.post("/auth/login", data={"username": admin["email"], "password": admin["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def college(client, admin_headers):
+    """
+    A new college per test, so tests don't see each other's rows.
+    """
+    n = next(_names)
+    response = client.post("/colleges/", headers=admin_headers,
+                           json={"name": f"Test College {n}", "domain": f"college{n}.test", "location": "Test"})
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def webhook_body(intent: str, parameters: dict, query_text: str = "test query") -> dict:
+    return {"session": "test-session",
+            "queryResult": {"intent": {"displayName": intent}, "parameters": parameters, "queryText": query_text}}
@@ -0,0 +1,15 @@
+from app import auth, models
+
+
+def test_email_login_wins_over_a_username_that_looks_like_it(client, db):
+    # Created in this order so the squatter's row comes first.
+    db.add(models.User(username="owner@test.local", email="squatter@test.local",
+                       hashed_password=auth.get_password_hash("squatter-password"), role="admin"))
+    db.add(models.User(username="owner", email="owner@test.local",
+                       hashed_password=auth.get_password_hash("owner-password"), role="admin"))
+    db.commit()
+
+    response = client.post("/auth/login", data={"username": "owner@test.local", "password": "owner-password"})
+    assert response.status_code == 200, response.text
+    assert auth.get_user_for_login(db, "owner@test.local").username == "owner"
+    assert auth.get_user_for_login(db, "owner").email == "owner@test.local"
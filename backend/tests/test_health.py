@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+from app.pool import PoolHealthCheck
+
+
+def test_health_check_reports_only_the_error_type():
+    missing = os.path.join(tempfile.mkdtemp(), "no-such-dir", "secret-db-name.db")
+    check = PoolHealthCheck(create_engine(f"sqlite:///{missing}"), interval=0)
+    check.check()
+    status = check.status()
+    assert status["failures"] == 1
+    assert status["last_error"] == "OperationalError"
+
+
+def test_health_endpoints_dont_show_connection_details(client):
+    for path in ("/health/db", "/health/changes", "/health/snapshot", "/health/intents", "/metrics"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert os.environ["DATABASE_URL"].split("///", 1)[1] not in response.text
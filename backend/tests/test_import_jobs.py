@@ -0,0 +1,114 @@
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import import_jobs, models
+from app.database import SessionLocal
+from app.importers import import_csv
+
+FAQ_CSV = b"category,question,answer\ngeneral,Q1?,A1\ngeneral,Q2?,A2\ngeneral,Q3?,A3\n"
+
+
+@pytest.fixture(autouse=True)
+def fresh_worker(monkeypatch):
+    monkeypatch.setattr(import_jobs, "_stopping", threading.Event())
+    monkeypatch.setattr(import_jobs, "_active_jobs", set())
+    monkeypatch.setattr(import_jobs, "_executor", None)
+
+
+def queued_job(db, college, tmp_path, status="queued"):
+    job = models.ImportJob(id=uuid.uuid4().hex, entity="faqs", college_id=college["id"], mode="insert", status=status)
+    db.add(job)
+    db.commit()
+    path = tmp_path / f"{job.id}.csv"
+    path.write_bytes(FAQ_CSV)
+    import_jobs._active_jobs.add(job.id)
+    return job.id, str(path)
+
+
+def job_status(db, job_id):
+    db.expire_all()
+    return db.get(models.ImportJob, job_id)
+
+
+def test_running_job_stops_between_batches_on_shutdown(db, college, tmp_path, monkeypatch):
+    def one_batch_then_shutdown(db, entity, college_id, f, on_progress, mode):
+        def progress(result):
+            import_jobs._stopping.set()
+            on_progress(result)
+        return import_csv(db, entity, college_id, f, batch_size=1, on_progress=progress, mode=mode)
+
+    monkeypatch.setattr(import_jobs, "import_csv", one_batch_then_shutdown)
+    job_id, path = queued_job(db, college, tmp_path)
+    import_jobs._run_import(job_id, path)
+
+    job = job_status(db, job_id)
+    assert (job.status, job.message, job.rows_processed) == ("failed", "Interrupted by server shutdown", 1)
+    assert db.query(models.FAQ).filter_by(college_id=college["id"]).count() == 1
+
+
+def test_shutdown_fails_queued_jobs_only(db, college, tmp_path):
+    queued_id, queued_path = queued_job(db, college, tmp_path)
+    running_id, _ = queued_job(db, college, tmp_path, status="running")
+
+    import_jobs.shutdown()
+    assert job_status(db, queued_id).status == "failed"
+    assert job_status(db, running_id).status == "running"  # it fails itself at its next batch
+
+    # A cancelled job that a pool thread had already picked up doesn't start.
+    import_jobs._run_import(queued_id, queued_path)
+    job = job_status(db, queued_id)
+    assert (job.status, job.message) == ("failed", "Interrupted by server shutdown")
+    assert db.query(models.FAQ).filter_by(college_id=college["id"]).count() == 0
+
+
+class SlowUpload(io.BytesIO):
+    def read(self, *args):
+        time.sleep(0.01)
+        return super().read(*args)
+
+
+class NoopExecutor:
+    def submit(self, *args):
+        pass
+
+
+def test_concurrent_submits_respect_the_queue_limit(college, tmp_path, monkeypatch):
+    monkeypatch.setattr(import_jobs, "IMPORT_MAX_QUEUED", 2)
+    monkeypatch.setattr(import_jobs, "IMPORT_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(import_jobs, "_get_executor", NoopExecutor)
+
+    def submit(_):
+        db = SessionLocal()
+        try:
+            import_jobs.submit_import(db, "faqs", college["id"], SlowUpload(FAQ_CSV), None)
+            return "queued"
+        except import_jobs.ImportQueueFull:
+            return "full"
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(submit, range(8)))
+    assert results.count("queued") == 2
+    assert len(import_jobs._active_jobs) == 2
+
+
+def test_failed_submit_cleans_up(db, college, tmp_path, monkeypatch):
+    class BrokenExecutor:
+        def submit(self, *args):
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(import_jobs, "IMPORT_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(import_jobs, "_get_executor", BrokenExecutor)
+    with pytest.raises(RuntimeError):
+        import_jobs.submit_import(db, "faqs", college["id"], io.BytesIO(FAQ_CSV), None)
+
+    assert list(tmp_path.iterdir()) == []
+    assert import_jobs._active_jobs == set()
+    job = db.query(models.ImportJob).filter_by(college_id=college["id"]).one()
+    assert (job.status, job.message) == ("failed", "Could not start the import")
@@ -0,0 +1,28 @@
+import io
+
+
+def upload(client, headers, entity, college_id, text, **form):
+    return client.post(f"/upload/{entity}/", headers=headers,
+                       data={"college_id": str(college_id), **form},
+                       files={"file": (f"{entity}.csv", io.BytesIO(text.encode()), "text/csv")})
+
+
+def test_missing_optional_column_uses_model_default(client, admin_headers, college):
+    response = upload(client, admin_headers, "faqs", college["id"],
+                      "category,question,answer\ngeneral,Is there a gym?,Yes\n")
+    assert response.status_code == 200, response.text
+
+    response = client.get("/faqs/", headers=admin_headers, params={"limit": 1000})
+    assert response.status_code == 200, response.text
+    imported = [faq for faq in response.json() if faq["question"] == "Is there a gym?"]
+    assert [faq["language"] for faq in imported] == ["en"]
+
+
+def test_blank_optional_value_uses_model_default(client, admin_headers, college, db):
+    from app import models
+
+    response = upload(client, admin_headers, "faqs", college["id"],
+                      "category,question,answer,language\ngeneral,Is there a pool?,No,\n", mode="upsert")
+    assert response.status_code == 200, response.text
+    faq = db.query(models.FAQ).filter_by(college_id=college["id"]).one()
+    assert faq.language == "en"
@@ -0,0 +1,169 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import main
+from app.intents import fallback
+from app.intents.cache import intent_cache
+from app.intents.fallback import CircuitBreaker, IntentSlots, LastGoodAnswers
+
+from conftest import webhook_body
+
+DIALOGFLOW_HEADERS = {"x-dialogflow-secret": "test-dialogflow-secret"}
+BUDGET = 0.2
+
+
+@pytest.fixture(autouse=True)
+def fresh_fallback(monkeypatch):
+    monkeypatch.setattr(main, "intent_breaker", CircuitBreaker(failure_threshold=1000, reset_seconds=30))
+    monkeypatch.setattr(main, "last_good_answers", LastGoodAnswers())
+    monkeypatch.setattr(main, "intent_slots", IntentSlots(8))
+    monkeypatch.setattr(main, "intent_budget", lambda intent_name: BUDGET)
+    intent_cache.clear()
+
+
+def ask(client, college, course="B.Tech CSE"):
+    body = webhook_body("Fee Deadline", {"college": college["name"], "course": course})
+    response = client.post("/webhook", json=body, headers=DIALOGFLOW_HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()["fulfillmentText"]
+
+
+def test_abandoned_lookups_are_capped(client, college, monkeypatch):
+    monkeypatch.setattr(main, "intent_slots", IntentSlots(2))
+    lock = threading.Lock()
+    running = [0, 0]  # now, most at once
+
+    def stalled(parameters, db):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        try:
+            time.sleep(BUDGET * 3)
+        finally:
+            with lock:
+                running[0] -= 1
+        return "late"
+
+    monkeypatch.setitem(main.INTENT_HANDLERS, "Fee Deadline", stalled)
+    with ThreadPoolExecutor(3) as pool:
+        for wave in range(5):
+            answers = list(pool.map(lambda course: ask(client, college, course), [f"wave {wave} {i}" for i in range(3)]))
+            assert all(answer != "late" for answer in answers)
+    assert running[1] <= 2
+    while main.intent_slots.in_use():
+        time.sleep(0.05)  # abandoned lookups give their slots back when they finish
+
+
+@pytest.fixture
+def fee(client, admin_headers, college):
+    response = client.post("/fees/", headers=admin_headers, json={
+        "college_id": college["id"], "program": "B.Tech CSE", "year": 1, "amount": 1000, "deadline": "2026-07-01",
+    })
+    assert response.status_code in (200, 201), response.text
+
+
+def counter(client, name, **labels) -> float:
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{wanted}}} " if labels else f"{name} "
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def stall(monkeypatch):
+    original = main.INTENT_HANDLERS["Fee Deadline"]
+
+    def slow(parameters, db):
+        time.sleep(BUDGET * 2)
+        return original(parameters, db)
+
+    monkeypatch.setitem(main.INTENT_HANDLERS, "Fee Deadline", slow)
+
+
+def test_slow_handler_serves_the_last_good_answer(client, college, fee, monkeypatch):
+    fresh = ask(client, college)
+    assert "July 01, 2026" in fresh
+    intent_cache.clear()
+    stall(monkeypatch)
+    timeouts = counter(client, "webhook_intent_timeouts_total", intent="Fee Deadline")
+    stale = counter(client, "webhook_intent_fallbacks_total", intent="Fee Deadline", reason="timeout", result="stale")
+
+    started = time.perf_counter()
+    assert ask(client, college) == fresh
+    assert time.perf_counter() - started < BUDGET * 2
+    assert counter(client, "webhook_intent_timeouts_total", intent="Fee Deadline") == timeouts + 1
+    assert counter(client, "webhook_intent_fallbacks_total", intent="Fee Deadline", reason="timeout",
+                   result="stale") == stale + 1
+
+
+def test_slow_handler_without_an_earlier_answer(client, college, fee, monkeypatch):
+    stall(monkeypatch)
+    none = counter(client, "webhook_intent_fallbacks_total", intent="Fee Deadline", reason="timeout", result="none")
+    assert ask(client, college) == "Sorry, I can’t look that up right now. Please try again in a minute."
+    assert counter(client, "webhook_intent_fallbacks_total", intent="Fee Deadline", reason="timeout",
+                   result="none") == none + 1
+
+
+def test_database_error_falls_back_instead_of_500(client, college, fee, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    fresh = ask(client, college)
+    intent_cache.clear()
+
+    def broken(parameters, db):
+        raise OperationalError("SELECT 1", {}, Exception("database is down"))
+
+    monkeypatch.setitem(main.INTENT_HANDLERS, "Fee Deadline", broken)
+    assert ask(client, college) == fresh
+    assert main.intent_breaker.failures == 1
+
+
+def test_breaker_opens_after_threshold_and_half_opens(client, college, fee, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.3, on_change=fallback.intent_breaker.on_change)
+    monkeypatch.setattr(main, "intent_breaker", breaker)
+    fresh = ask(client, college)
+    calls = []
+    original = main.INTENT_HANDLERS["Fee Deadline"]
+
+    def broken(parameters, db):
+        calls.append(1)
+        raise OperationalError("SELECT 1", {}, Exception("database is down"))
+
+    monkeypatch.setitem(main.INTENT_HANDLERS, "Fee Deadline", broken)
+    for i in range(3):
+        intent_cache.clear()
+        assert ask(client, college) == fresh
+    assert (breaker.state, len(calls)) == ("open", 3)
+
+    # While open, nothing reaches the handler.
+    intent_cache.clear()
+    assert ask(client, college) == fresh
+    assert len(calls) == 3
+    assert counter(client, "webhook_intent_breaker_open") == 1
+
+    # After reset_seconds one trial goes through; its success closes the breaker.
+    time.sleep(0.35)
+    monkeypatch.setitem(main.INTENT_HANDLERS, "Fee Deadline", original)
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.opened_at -= 1  # let the request below be the trial
+    assert ask(client, college) == fresh
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.1)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.15)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
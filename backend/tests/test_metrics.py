@@ -0,0 +1,21 @@
+def request_labels(client) -> set:
+    labels = set()
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith("http_request_duration_seconds_count{"):
+            labels.add(line.split('route="', 1)[1].split('"', 1)[0])
+    return labels
+
+
+def test_routes_are_labelled_by_template(client, admin_headers):
+    client.get("/upload/jobs/no-such-job", headers=admin_headers)
+    client.get("/no-such-page")
+    labels = request_labels(client)
+    assert "/upload/jobs/{job_id}" in labels
+    assert "unmatched" in labels
+
+
+def test_mounted_app_routes_keep_the_mount_path(client):
+    client.get("/admin/login")
+    labels = request_labels(client)
+    assert "/admin/login" in labels
+    assert "/login" not in labels
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.intents.cache import intent_cache
+from app.profiling import assert_max_queries, profile_queries
+
+from conftest import webhook_body
+
+DIALOGFLOW_HEADERS = {"x-dialogflow-secret": "test-dialogflow-secret"}
+
+
+@pytest.fixture
+def fees(client, admin_headers, college):
+    for year in range(1, 6):
+        response = client.post("/fees/", headers=admin_headers, json={
+            "college_id": college["id"], "program": "B.Tech CSE", "year": year, "amount": 1000, "deadline": "2026-07-01",
+        })
+        assert response.status_code in (200, 201), response.text
+
+
+def test_fee_list_query_budget(client, admin_headers, fees):
+    with assert_max_queries(2):
+        response = client.get("/fees/", headers=admin_headers, params={"limit": 1000})
+    assert response.status_code == 200
+    assert len(response.json()) >= 5
+
+
+def test_webhook_query_budget(client, college, fees):
+    body = webhook_body("Fee Deadline", {"college": college["name"], "course": "B.Tech CSE"})
+    intent_cache.clear()
+    with assert_max_queries(3):
+        response = client.post("/webhook", json=body, headers=DIALOGFLOW_HEADERS)
+    assert response.status_code == 200
+    assert "B.Tech CSE" in response.json()["fulfillmentText"]
+    # Repeats are answered from the intent cache.
+    with assert_max_queries(0):
+        assert client.post("/webhook", json=body, headers=DIALOGFLOW_HEADERS).json() == response.json()
+
+
+def test_assert_max_queries_fails_over_budget(db):
+    with pytest.raises(AssertionError, match="Expected at most 1 queries"):
+        with assert_max_queries(1):
+            db.execute(select(models.College.id)).all()
+            db.execute(select(models.Fee.id)).all()
+
+
+def test_summary_flags_repeated_statements(db, college):
+    with profile_queries() as profile:
+        for _ in range(3):
+            db.execute(select(models.College.name).where(models.College.id == college["id"])).all()
+    assert profile.count == 3
+    assert "possible N+1: 3x SELECT colleges.name" in profile.summary()
@@ -0,0 +1,85 @@
+import pytest
+
+from app import models
+from app.auth import get_user_by_email
+from app.database import SessionLocal
+from app.profiling import assert_max_queries, profile_queries
+from app.reference_cache import reference_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    reference_cache.clear()
+
+
+def in_fresh_session(lookup):
+    """
+    Runs `lookup(db)` in a new session, as a separate request would, and
+    returns (result, queries issued).
+    """
+    db = SessionLocal()
+    try:
+        with profile_queries() as profile:
+            result = lookup(db)
+        return result, profile.count
+    finally:
+        db.close()
+
+
+def test_college_by_primary_key_is_loaded_once(college):
+    _, queries = in_fresh_session(lambda db: db.get(models.College, college["id"]))
+    assert queries == 1
+    for _ in range(3):
+        name, queries = in_fresh_session(lambda db: db.get(models.College, college["id"]).name)
+        assert (name, queries) == (college["name"], 0)
+
+
+def test_department_college_lazy_load_is_cached(college, db):
+    department = models.Department(college_id=college["id"], dept_name="CSE")
+    db.add(department)
+    db.commit()
+
+    in_fresh_session(lambda db: db.get(models.Department, department.id).college)
+    with assert_max_queries(0):
+        db = SessionLocal()
+        try:
+            assert db.get(models.Department, department.id).college.name == college["name"]
+        finally:
+            db.close()
+
+
+def test_user_by_email_is_cached(admin_headers):
+    def lookup(db):
+        with profile_queries() as profile:
+            user = get_user_by_email(db, "admin@test.local")
+        return user.username, [sql for sql, _ in profile.statements if "email" in sql.split("WHERE")[-1]]
+
+    # The first lookup resolves the email; later ones go straight to the
+    # cached primary key, whose row is loaded once and then cached too.
+    (username, by_email), _ = in_fresh_session(lookup)
+    assert username == "admin" and len(by_email) == 1
+    (_, by_email), queries = in_fresh_session(lookup)
+    assert by_email == [] and queries <= 1
+    for _ in range(3):
+        (username, _), queries = in_fresh_session(lookup)
+        assert (username, queries) == ("admin", 0)
+
+
+def test_commit_evicts_the_changed_row(college, db):
+    in_fresh_session(lambda db: db.get(models.College, college["id"]))
+
+    db.get(models.College, college["id"]).location = "Moved"
+    db.commit()
+
+    location, queries = in_fresh_session(lambda db: db.get(models.College, college["id"]).location)
+    assert location == "Moved"
+    assert queries == 1
+    _, queries = in_fresh_session(lambda db: db.get(models.College, college["id"]))
+    assert queries == 0
+
+
+def test_cache_off_always_queries(college, monkeypatch):
+    monkeypatch.setattr(reference_cache, "max_size", 0)
+    for _ in range(3):
+        _, queries = in_fresh_session(lambda db: db.get(models.College, college["id"]))
+        assert queries == 1
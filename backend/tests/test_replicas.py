@@ -0,0 +1,84 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.replicas import REPLICA_COOKIE, ReadYourWritesMiddleware, ReplicaSet, RoutingSession
+from app.schema import create_schema
+
+
+def college_names(session) -> set:
+    return set(session.scalars(select(models.College.name)))
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """
+    A primary and a "replica" in separate SQLite files, each holding one
+    college, so every read shows which database answered.
+    """
+    engines = {}
+    for name in ("primary", "replica"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        create_schema(engine)
+        with engine.begin() as conn:
+            conn.execute(models.College.__table__.insert().values(name=f"{name} college", domain=f"{name}.test"))
+        engines[name] = engine
+    replicas = ReplicaSet([engines["replica"]], check_interval=0, retry_seconds=60)
+    Session = sessionmaker(class_=RoutingSession, autoflush=False, bind=engines["primary"], replicas=replicas)
+    yield Session, replicas
+    for engine in engines.values():
+        engine.dispose()
+
+
+def test_read_only_session_reads_from_the_replica(databases):
+    Session, _ = databases
+    with Session(read_only=True) as db:
+        assert college_names(db) == {"replica college"}
+    with Session() as db:
+        assert college_names(db) == {"primary college"}
+
+
+def test_replica_marked_down_is_skipped(databases):
+    Session, replicas = databases
+    replicas.mark_down(replicas.engines[0])
+    with Session(read_only=True) as db:
+        assert college_names(db) == {"primary college"}
+
+
+def test_replica_dropping_mid_session_fails_over(databases):
+    Session, replicas = databases
+    with Session(read_only=True) as db:
+        assert college_names(db) == {"replica college"}
+        db.connection().connection.dbapi_connection.close()  # the replica goes away under the session
+        assert college_names(db) == {"primary college"}
+    assert not replicas.healthy(0)
+
+
+def test_writes_keep_the_writer_on_the_primary(databases):
+    Session, replicas = databases
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/colleges")
+    def add_college():
+        with Session() as db:
+            db.add(models.College(name="new college", domain="new.test"))
+            db.commit()
+
+    @app.get("/colleges")
+    def list_colleges():
+        with Session(read_only=True) as db:
+            return sorted(college_names(db))
+
+    with TestClient(app) as writer, TestClient(app) as other:
+        response = writer.post("/colleges")
+        assert REPLICA_COOKIE in response.cookies
+        assert replicas.holding_primary()  # every read in this worker, for a while
+        assert "new college" in other.get("/colleges").json()
+
+        replicas._primary_until = 0  # only the cookie is left
+        assert writer.get("/colleges").json() == ["new college", "primary college"]
+        assert other.get("/colleges").json() == ["replica college"]
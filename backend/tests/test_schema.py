@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine, event, text
+
+from app import models
+from app.schema import create_schema
+
+
+def test_sqlite_log_timestamps_are_converted_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    create_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA user_version = 0"))  # as if created before the conversion
+        conn.execute(text("INSERT INTO logs (query, timestamp) VALUES ('old', '2025-01-02T03:04:05')"))
+
+    models.sync_log_timestamps(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT timestamp FROM logs")).scalar() == "2025-01-02 03:04:05"
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    models.sync_log_timestamps(engine)
+    assert not [sql for sql in statements if sql.startswith("UPDATE logs")]
+    engine.dispose()
@@ -0,0 +1,31 @@
+import datetime
+
+import pytest
+
+from app import models
+from app.intents.snapshot import INTENT_SNAPSHOT
+from app.profiling import profile_queries
+
+
+def test_writes_skip_the_data_version_without_snapshot_mode(db, college):
+    assert not INTENT_SNAPSHOT
+    db.add(models.Fee(college_id=college["id"], program="M.Tech", year=1, amount=1, deadline=datetime.date(2026, 7, 1)))
+    with profile_queries() as profile:
+        db.commit()
+    assert profile.count >= 1
+    assert not [sql for sql, _ in profile.statements if "data_version" in sql]
+
+
+def test_snapshot_stats_report_totals_measured_at_load(db, college, monkeypatch):
+    from app.intents import snapshot as snapshot_module
+    from app.intents.snapshot import KnowledgeSnapshot, Snapshot
+
+    loaded = Snapshot.load(db)
+    assert loaded.memory["total_bytes"] >= loaded.memory["largest_college_bytes"] > 0
+
+    holder = KnowledgeSnapshot(enabled=True)
+    holder._current = loaded
+    monkeypatch.setattr(snapshot_module, "_deep_size", lambda *args: pytest.fail("measured on a stats request"))
+    stats = holder.stats()
+    assert stats["total_bytes"] == loaded.memory["total_bytes"]
+    assert "per_college_bytes" not in stats